@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pydantic_settings import BaseSettings
 
 
@@ -6,10 +7,26 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     
+    # Database connection pool
+    DB_MIN_CONNS: int = 2
+    DB_MAX_CONNS: int = 100  # Lower this when connecting directly to a small Supabase tier
+    DB_POOL_TIMEOUT: float = 10.0  # Seconds to wait for a free connection before failing
+    DB_POOL_MAX_LIFETIME: float = 1800.0  # Recycle connections after 30 minutes
+    DB_POOL_MAX_IDLE: float = 600.0  # Close idle connections after 10 minutes
+    DB_POOL_NUM_WORKERS: int = 3  # Background workers for connecting/recycling
+    DB_CONNECT_TIMEOUT: int = 5  # libpq connect timeout (seconds)
+    # Set when DATABASE_URL points at a transaction-mode pooler (PgBouncer /
+    # Supabase pooler on port 6543). Server-side prepared statements don't
+    # survive transaction pooling, so statement preparation is disabled.
+    DB_USE_PGBOUNCER: bool = False
+    
     # Supabase
     SUPABASE_URL: str
     SUPABASE_SERVICE_ROLE_KEY: str
     SUPABASE_ANON_KEY: str
+    # Legacy HS256 JWT secret; when set, Storage URLs are signed locally
+    # (no /object/sign request). Leave empty to sign through the API.
+    SUPABASE_JWT_SECRET: str = ""
     
     # Storage Buckets
     BUCKET_VIDEOS: str = "videos"
@@ -21,11 +38,44 @@ class Settings(BaseSettings):
     MODEL_PRETRAIN: str = "openai"
     EMB_DIM: int = 512  # ViT-B-32 produces 512-dim embeddings
     
+    # Ingestion
+    SPOOL_DIR: str = os.path.join(tempfile.gettempdir(), "video-uploads")  # Uploads wait here until ingested
+    INGEST_WORKERS: int = 1  # Worker processes (each loads its own models)
+    INGEST_MAX_PENDING: int = 8  # Running + queued jobs before uploads get 503
+    # Probe videos and grab single frames with OpenCV in-process instead of
+    # spawning ffprobe/ffmpeg (saves ~100-200ms per call on short clips)
+    VIDEO_IN_PROCESS_DECODE: bool = False
+    # Frames are downscaled in ffmpeg so neither side exceeds this (0 = keep
+    # native size). CLIP sees 224px and BLIP 384px; stored frame previews
+    # and thumbnails use the same frames.
+    FRAME_MAX_SIZE: int = 768
+    FFMPEG_HWACCEL: str = ""  # ffmpeg -hwaccel for frame decoding ("cuda", "videotoolbox", ...)
+    # torch.compile the CLIP image encoder (CUDA graphs on CUDA) and, on
+    # CUDA, BLIP's vision encoder in ingestion workers; pays a one-off
+    # compile per worker process
+    TORCH_COMPILE: bool = False
+    DOWNLOAD_PARALLELISM: int = 4  # Connections per large Storage download (ranged parts)
+    # Encode frame JPEGs with nvJPEG (torchvision) on CUDA workers instead of
+    # libjpeg-turbo on the CPU; ignored without a CUDA device
+    USE_GPU_JPEG: bool = False
+    
     # API
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
+    LOG_LEVEL: str = "INFO"  # Set to DEBUG for per-search score dumps
     
     # OpenAI
     OPENAI_API_KEY: str = ""
+    OPENAI_MAX_RPM: int = 0  # Requests per minute for the semantic filter (0 = unlimited)
+    OPENAI_MAX_TPM: int = 0  # Estimated tokens per minute (0 = unlimited)
+    
+    # Search semantic filter: "gpt" (GPT-scored captions), "embedding"
+    # (cosine between query and stored caption embeddings) or
+    # "cross_encoder" (local MiniLM cross-encoder); only "gpt" calls an API
+    SEMANTIC_FILTER: str = "gpt"
+    # Minimum query-to-caption cosine in "embedding" mode. Server-side because
+    # the request's semantic_threshold is calibrated for GPT scores, and
+    # CLIP text-to-text cosines between unrelated captions often exceed 0.5
+    SEMANTIC_EMBEDDING_THRESHOLD: float = 0.8
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,45 @@
+"""Prometheus metrics for the API."""
+
+from prometheus_client import Gauge, Histogram
+
+
+# Connection pool gauges (read from pool.get_stats() at scrape time)
+POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Connections currently managed by the pool (busy + idle)"
+)
+POOL_AVAILABLE = Gauge(
+    "db_pool_available",
+    "Idle connections ready to be checked out"
+)
+POOL_WAITING = Gauge(
+    "db_pool_waiting",
+    "Requests queued waiting for a connection"
+)
+POOL_MAX_SIZE = Gauge(
+    "db_pool_max_size",
+    "Configured maximum pool size"
+)
+
+# Time spent waiting for a connection checkout
+ACQUIRE_SECONDS = Histogram(
+    "db_connection_acquire_seconds",
+    "Time to acquire a connection from the pool",
+    buckets=(.001, .005, .01, .05, .1, .5, 1, 5)
+)
+
+
+def bind_pool_gauges(get_stats) -> None:
+    """
+    Point the pool gauges at a stats callable.
+
+    Gauges are evaluated lazily on each scrape, so no background refresh
+    task is needed.
+
+    Args:
+        get_stats: Callable returning psycopg_pool stats (pool.get_stats)
+    """
+    POOL_SIZE.set_function(lambda: get_stats().get("pool_size", 0))
+    POOL_AVAILABLE.set_function(lambda: get_stats().get("pool_available", 0))
+    POOL_WAITING.set_function(lambda: get_stats().get("requests_waiting", 0))
+    POOL_MAX_SIZE.set_function(lambda: get_stats().get("pool_max", 0))
@@ -1,54 +1,108 @@
 """Database connection pool for FastAPI."""
 
+import logging
+import time
+import psycopg
 import psycopg_pool
+from contextlib import asynccontextmanager
+from pgvector.psycopg import register_vector_async
 from app.core.config import settings
+from app.core.metrics import ACQUIRE_SECONDS, bind_pool_gauges
 
 
-# Connection pool (lazy-initialized)
+logger = logging.getLogger(__name__)
+
+# Connection pool (created lazily, opened in the app lifespan)
 _pool = None
 
 
-def get_pool() -> psycopg_pool.ConnectionPool:
+async def _configure_connection(conn: psycopg.AsyncConnection) -> None:
+    """
+    Prepare a new pool connection.
+
+    Registers the pgvector type so numpy arrays bind directly as vectors,
+    and prepares every statement on first use so hot queries skip
+    parse/plan for the lifetime of the connection. Behind a transaction
+    pooler (DB_USE_PGBOUNCER) statements are never prepared instead.
+    """
+    await register_vector_async(conn)
+    # psycopg keys prepared statements by query text (and parameter types),
+    # keeping up to conn.prepared_max (100) per connection
+    conn.prepare_threshold = None if settings.DB_USE_PGBOUNCER else 0
+
+
+def get_pool() -> psycopg_pool.AsyncConnectionPool:
     """
     Get or create database connection pool.
-    
+
+    The pool is created closed; `open_pool()` must be awaited (done in the
+    FastAPI lifespan) before connections can be checked out.
+
     Returns:
-        psycopg ConnectionPool
+        psycopg AsyncConnectionPool
     """
     global _pool
-    
+
     if _pool is None:
-        _pool = psycopg_pool.ConnectionPool(
+        _pool = psycopg_pool.AsyncConnectionPool(
             settings.DATABASE_URL,
-            min_size=1,
-            max_size=3,  # Conservative for Supabase free tier (limit is ~10 total)
-            timeout=30.0,  # Increased timeout for slow connections
+            kwargs={"connect_timeout": settings.DB_CONNECT_TIMEOUT},
+            min_size=settings.DB_MIN_CONNS,
+            max_size=settings.DB_MAX_CONNS,
+            timeout=settings.DB_POOL_TIMEOUT,
             max_waiting=20,
-            max_lifetime=300,  # Recycle connections after 5 minutes
-            max_idle=60  # Close idle connections after 1 minute
+            max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+            max_idle=settings.DB_POOL_MAX_IDLE,
+            num_workers=settings.DB_POOL_NUM_WORKERS,
+            configure=_configure_connection,
+            open=False
         )
-        print(f"✅ Database connection pool created (min=1, max=3)")
-    
+        logger.info(
+            "Database connection pool created (min=%d, max=%d)",
+            settings.DB_MIN_CONNS, settings.DB_MAX_CONNS
+        )
+
     return _pool
 
 
-def get_connection():
+async def open_pool(wait: bool = True, timeout: float = 10.0):
     """
-    Get a connection from the pool (context manager).
-    
+    Open the connection pool.
+
+    Args:
+        wait: Block until min_size connections are established
+        timeout: Max seconds to wait (raises psycopg_pool.PoolTimeout)
+    """
+    await get_pool().open(wait=wait, timeout=timeout)
+
+
+@asynccontextmanager
+async def get_connection():
+    """
+    Get a connection from the pool (async context manager).
+
+    Checkout wait time is recorded in the db_connection_acquire_seconds
+    histogram.
+
     Usage:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT ...")
+        async with get_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT ...")
     """
     pool = get_pool()
-    return pool.connection()
+    start_time = time.perf_counter()
+    async with pool.connection() as conn:
+        ACQUIRE_SECONDS.observe(time.perf_counter() - start_time)
+        yield conn
+
 
+# Pool gauges read live stats at scrape time (empty once the pool is closed)
+bind_pool_gauges(lambda: _pool.get_stats() if _pool else {})
 
-def close_pool():
+
+async def close_pool():
     """Close the connection pool."""
     global _pool
     if _pool:
-        _pool.close()
+        await _pool.close()
         _pool = None
-
@@ -1,14 +1,27 @@
 """FastAPI application."""
 
+import logging
+import os
+import time
+from typing import Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from prometheus_client import make_asgi_app
+from psycopg_pool import PoolTimeout
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.routers import search, videos, debug
-from app.db import close_pool, get_connection
+from app.db import open_pool, close_pool, get_pool
+from app.utils.openai_filter import close_async_openai_client
 
 
+logging.basicConfig(
+    level=settings.LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan events (startup/shutdown)."""
@@ -18,11 +31,28 @@ async def lifespan(app: FastAPI):
     print(f"   Model: {settings.MODEL_NAME} ({settings.MODEL_PRETRAIN})")
     print(f"   Embedding Dim: {settings.EMB_DIM}")
     
+    # Uploads are written straight into the spool directory
+    os.makedirs(settings.SPOOL_DIR, exist_ok=True)
+    
+    # Open without waiting (a timed-out pool.wait() closes the pool for
+    # good), then give it 10s to connect so the first request doesn't pay
+    # the connect/TLS handshake
+    await open_pool(wait=False)
+    try:
+        async with get_pool().connection(timeout=10.0):
+            pass
+        print("   ✅ Database pool ready")
+    except PoolTimeout:
+        # The pool keeps connecting in the background; /health reports the state
+        print("   ⚠️  Database pool not ready after 10s, continuing startup")
+    
     yield
     
     # Shutdown
     print("👋 Shutting down...")
-    close_pool()
+    videos.shutdown_ingest_executor()
+    await close_async_openai_client()
+    await close_pool()
 
 
 # Create FastAPI app
@@ -30,7 +60,8 @@ app = FastAPI(
     title="Video Semantic Search API",
     description="Content-based video search using OpenCLIP and pgvector",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -47,17 +78,57 @@ app.include_router(search.router)
 app.include_router(videos.router)
 app.include_router(debug.router)
 
+# Prometheus scrape endpoint (pool gauges + connection acquire histogram)
+app.mount("/metrics", make_asgi_app())
+
+
+# Health probe throttling: the DB probe runs at most once per interval and
+# is skipped while requests are queued for a connection, so /health never
+# competes with real traffic for the pool.
+HEALTH_PROBE_INTERVAL_S = 5.0
+HEALTH_PROBE_TIMEOUT_S = 2.0
+
+_last_db_check: dict = {}
+_last_db_check_at = 0.0  # time.monotonic() of the last probe
+_last_db_ok_ts: Optional[float] = None  # Wall-clock time of the last successful probe
+
+
+async def _probe_database() -> dict:
+    """Run SELECT 1 on a pooled connection, bounded by HEALTH_PROBE_TIMEOUT_S."""
+    global _last_db_ok_ts
+    
+    try:
+        start_time = time.time()
+        async with get_pool().connection(timeout=HEALTH_PROBE_TIMEOUT_S) as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT 1")
+                await cur.fetchone()
+        
+        _last_db_ok_ts = time.time()
+        db_response_time = (_last_db_ok_ts - start_time) * 1000
+        return {
+            "status": "healthy",
+            "response_time_ms": round(db_response_time, 2)
+        }
+    except Exception as e:
+        return {
+            "status": "unhealthy",
+            "error": str(e)
+        }
+
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """
     Health check endpoint with database connectivity test.
     
+    The database probe result is reused for HEALTH_PROBE_INTERVAL_S, and
+    not refreshed at all while requests are waiting on the pool.
+    
     Returns:
         Health status including database and connection pool status
     """
-    import time
-    from app.db import get_pool
+    global _last_db_check, _last_db_check_at
     
     health_status = {
         "service": "video-semantic-search",
@@ -67,42 +138,25 @@ def health_check():
         "checks": {}
     }
     
-    # Check database connectivity
-    try:
-        start_time = time.time()
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
-                cur.fetchone()
-        
-        db_response_time = (time.time() - start_time) * 1000
-        health_status["checks"]["database"] = {
-            "status": "healthy",
-            "response_time_ms": round(db_response_time, 2)
-        }
-    except Exception as e:
-        health_status["status"] = "unhealthy"
-        health_status["checks"]["database"] = {
-            "status": "unhealthy",
-            "error": str(e)
-        }
-    
     # Check connection pool
+    stats = {}
     try:
-        pool = get_pool()
+        stats = get_pool().get_stats()
+        size = stats.get("pool_size", 0)
+        available = stats.get("pool_available", 0)
         pool_status = "healthy"
         
-        if pool.available == 0:
+        if available == 0:
             pool_status = "critical"
             health_status["status"] = "degraded"
-        elif pool.available < pool.size * 0.3:
+        elif available < size * 0.3:
             pool_status = "degraded"
         
         health_status["checks"]["connection_pool"] = {
             "status": pool_status,
-            "size": pool.size,
-            "available": pool.available,
-            "waiting": pool.waiting
+            "size": size,
+            "available": available,
+            "waiting": stats.get("requests_waiting", 0)
         }
     except Exception as e:
         health_status["status"] = "unhealthy"
@@ -111,6 +165,23 @@ def health_check():
             "error": str(e)
         }
     
+    # Check database connectivity
+    now = time.monotonic()
+    probe_due = not _last_db_check or now - _last_db_check_at >= HEALTH_PROBE_INTERVAL_S
+    
+    if probe_due and stats.get("requests_waiting", 0) == 0:
+        _last_db_check = await _probe_database()
+        _last_db_check_at = now
+        db_check = dict(_last_db_check)
+    else:
+        db_check = dict(_last_db_check or {"status": "unknown"})
+        db_check["cached"] = True
+        db_check["last_ok_timestamp"] = _last_db_ok_ts
+    
+    if db_check["status"] == "unhealthy":
+        health_status["status"] = "unhealthy"
+    health_status["checks"]["database"] = db_check
+    
     return health_status
 
 
@@ -1,11 +1,13 @@
 """Debug and monitoring endpoints."""
 
+import time
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
 from app.db import get_pool, get_connection
+from app.routers.search import _encode_text_cached
 
 router = APIRouter(prefix="/debug", tags=["debug"])
 
@@ -44,31 +46,35 @@ def get_pool_stats():
     """
     try:
         pool = get_pool()
+        stats = pool.get_stats()
+        size = stats.get("pool_size", 0)
+        available = stats.get("pool_available", 0)
+        waiting = stats.get("requests_waiting", 0)
         
         # Determine pool status
-        if pool.available == 0:
-            status = "warning" if pool.waiting > 0 else "critical"
-        elif pool.available < pool.size * 0.3:  # Less than 30% available
+        if available == 0:
+            status = "warning" if waiting > 0 else "critical"
+        elif available < size * 0.3:  # Less than 30% available
             status = "degraded"
         else:
             status = "healthy"
         
         return PoolStats(
             name="postgres_pool",
-            size=pool.size,
-            available=pool.available,
-            waiting=pool.waiting,
+            size=size,
+            available=available,
+            waiting=waiting,
             max_size=pool.max_size,
             min_size=pool.min_size,
             status=status,
-            timestamp=datetime.utcnow().isoformat()
+            timestamp=datetime.now(timezone.utc).isoformat()
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get pool stats: {str(e)}")
 
 
 @router.get("/test-connection", response_model=ConnectionTest)
-def test_database_connection():
+async def test_database_connection():
     """
     Test database connectivity and measure response time.
     
@@ -77,16 +83,14 @@ def test_database_connection():
     Returns:
         ConnectionTest with connection status and timing
     """
-    import time
-    
     start_time = time.time()
     
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
+        async with get_connection() as conn:
+            async with conn.cursor() as cur:
                 # Simple query to test connection
-                cur.execute("SELECT 1")
-                result = cur.fetchone()
+                await cur.execute("SELECT 1")
+                result = await cur.fetchone()
                 
                 if result and result[0] == 1:
                     response_time = (time.time() - start_time) * 1000  # Convert to ms
@@ -120,25 +124,29 @@ def get_pool_health():
     """
     try:
         pool = get_pool()
+        stats = pool.get_stats()
+        size = stats.get("pool_size", 0)
+        available = stats.get("pool_available", 0)
+        waiting = stats.get("requests_waiting", 0)
         
         # Calculate metrics
-        utilization = ((pool.size - pool.available) / pool.size * 100) if pool.size > 0 else 0
-        capacity = (pool.available / pool.max_size * 100) if pool.max_size > 0 else 0
+        utilization = ((size - available) / size * 100) if size > 0 else 0
+        capacity = (available / pool.max_size * 100) if pool.max_size > 0 else 0
         
         # Generate recommendations
         recommendations = []
         
-        if pool.available == 0:
+        if available == 0:
             recommendations.append({
                 "level": "critical",
                 "message": "No connections available! Requests will be queued or timeout.",
                 "action": "Check for connection leaks. Ensure connections are closed properly."
             })
         
-        if pool.waiting > 5:
+        if waiting > 5:
             recommendations.append({
                 "level": "warning",
-                "message": f"{pool.waiting} requests waiting for connections.",
+                "message": f"{waiting} requests waiting for connections.",
                 "action": "Consider increasing max_size or optimizing slow queries."
             })
         
@@ -149,7 +157,7 @@ def get_pool_health():
                 "action": "Monitor for connection leaks or increase pool size."
             })
         
-        if pool.size < pool.min_size:
+        if size < pool.min_size:
             recommendations.append({
                 "level": "info",
                 "message": "Pool is below minimum size. New connections will be created.",
@@ -163,25 +171,33 @@ def get_pool_health():
                 "action": "No action needed."
             })
         
+        cache_info = _encode_text_cached.cache_info()
+        
         return {
-            "status": "healthy" if utilization < 80 and pool.available > 0 else "degraded",
-            "timestamp": datetime.utcnow().isoformat(),
+            "status": "healthy" if utilization < 80 and available > 0 else "degraded",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "metrics": {
-                "current_size": pool.size,
-                "available": pool.available,
-                "in_use": pool.size - pool.available,
-                "waiting": pool.waiting,
+                "current_size": size,
+                "available": available,
+                "in_use": size - available,
+                "waiting": waiting,
                 "max_size": pool.max_size,
                 "min_size": pool.min_size,
                 "utilization_percent": round(utilization, 2),
                 "capacity_percent": round(capacity, 2)
             },
+            "query_embedding_cache": {
+                "hits": cache_info.hits,
+                "misses": cache_info.misses,
+                "size": cache_info.currsize,
+                "max_size": cache_info.maxsize
+            },
             "recommendations": recommendations,
             "tips": [
                 "Keep database operations short (<100ms)",
-                "Always use 'with get_connection()' to ensure cleanup",
+                "Always use 'async with get_connection()' to ensure cleanup",
                 "Close connections before making HTTP calls or processing",
-                "Monitor this endpoint regularly for early warning signs"
+                "Scrape /metrics for pool gauges and connection acquire latency"
             ]
         }
     except Exception as e:
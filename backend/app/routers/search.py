@@ -1,18 +1,218 @@
 """Semantic search endpoint."""
 
+import asyncio
+import logging
+import numpy as np
+from functools import lru_cache, partial
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from psycopg.rows import dict_row
 from pydantic import BaseModel
 from typing import List, Optional
 
 from app.db import get_connection
 from worker.utils.embeddings import encode_text
-from worker.utils.supabase_io import get_signed_url
+from worker.utils.scorer import score_batch
+from worker.utils.supabase_io import cached_signed_urls, get_signed_urls
 from app.core.config import settings
 from app.utils.openai_filter import filter_results_by_semantic_similarity
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/v1/search", tags=["search"])
 
+# Segments within the same window of a video are collapsed into one moment
+MOMENT_BUCKET_MS = 2000
+
+# ANN candidates fetched per requested result, before moment collapsing
+CANDIDATE_MULTIPLIER = 5
+
+# Signed preview URL lifetime (URLs are cached in supabase_io)
+PREVIEW_URL_EXPIRES_S = 3600
+
+# Stored frame_url values are prefixed with the bucket name
+_FRAMES_BUCKET_PREFIX = f"{settings.BUCKET_FRAMES}/"
+
+# Embeddings are stored as halfvec, so the query is cast to match (and use
+# the halfvec index); caption_emb is read back as vector, which loads as a
+# float32 numpy array.
+# Params: vector, user_id, [video_id,] candidate limit, min_score, top_k
+
+# Only the GPT filter's score cache reads caption_emb, so other modes don't
+# ship 512 floats per candidate
+_CAPTION_EMB_COLUMN = (
+    ",\n            s.caption_emb::vector AS caption_emb"
+    if settings.SEMANTIC_FILTER == "gpt" else ""
+)
+
+SQL_SEARCH_ALL = f"""
+    WITH q AS (
+        SELECT %s::halfvec AS v
+    ),
+    candidates AS (
+        SELECT 
+            s.id AS segment_id,
+            s.video_id,
+            s.t_start_ms,
+            s.frame_url,
+            1 - (s.emb <=> q.v) AS score,
+            s.caption,
+            1 - (s.caption_emb <=> q.v) AS caption_score{_CAPTION_EMB_COLUMN}
+        FROM public.segments s
+        CROSS JOIN q
+        JOIN public.videos v ON s.video_id = v.id
+        WHERE v.user_id = %s 
+          AND v.status = 'ready'
+        ORDER BY s.emb <=> q.v
+        LIMIT %s
+    ),
+    moments AS (
+        SELECT DISTINCT ON (video_id, t_start_ms / {MOMENT_BUCKET_MS}) *
+        FROM candidates
+        WHERE score >= %s
+        ORDER BY video_id, t_start_ms / {MOMENT_BUCKET_MS}, score DESC
+    )
+    SELECT * FROM moments
+    ORDER BY score DESC
+    LIMIT %s
+"""
+
+SQL_SEARCH_VIDEO = f"""
+    WITH q AS (
+        SELECT %s::halfvec AS v
+    ),
+    candidates AS (
+        SELECT 
+            s.id AS segment_id,
+            s.video_id,
+            s.t_start_ms,
+            s.frame_url,
+            1 - (s.emb <=> q.v) AS score,
+            s.caption,
+            1 - (s.caption_emb <=> q.v) AS caption_score{_CAPTION_EMB_COLUMN}
+        FROM public.segments s
+        CROSS JOIN q
+        JOIN public.videos v ON s.video_id = v.id
+        WHERE v.user_id = %s 
+          AND v.status = 'ready'
+          AND s.video_id = %s
+        ORDER BY s.emb <=> q.v
+        LIMIT %s
+    ),
+    moments AS (
+        SELECT DISTINCT ON (video_id, t_start_ms / {MOMENT_BUCKET_MS}) *
+        FROM candidates
+        WHERE score >= %s
+        ORDER BY video_id, t_start_ms / {MOMENT_BUCKET_MS}, score DESC
+    )
+    SELECT * FROM moments
+    ORDER BY score DESC
+    LIMIT %s
+"""
+
+
+@lru_cache(maxsize=4096)
+def _encode_text_cached(query: str) -> np.ndarray:
+    """
+    Encode a normalized query, memoizing the result.
+    
+    The CLIP tokenizer lowercases and collapses whitespace itself, so
+    normalizing here only widens cache hits without changing the vector.
+    
+    Args:
+        query: Normalized query text (stripped, lowercased)
+    
+    Returns:
+        Read-only embedding array (shared between cache hits)
+    """
+    embedding = encode_text(query)
+    embedding.setflags(write=False)
+    return embedding
+
+
+# Encodes currently running, keyed by normalized query; concurrent requests
+# for the same query await one shared task instead of re-encoding
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def _encode_done(key: str, task: asyncio.Task) -> None:
+    """Drop a finished encode from _inflight."""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # Mark retrieved in case every waiter was cancelled
+
+
+async def encode_query(query: str) -> np.ndarray:
+    """
+    Encode search query text off the event loop.
+    
+    Repeat queries are served from the LRU cache, and duplicate queries
+    arriving while an encode is in flight share its result.
+    
+    Args:
+        query: Raw query text
+    
+    Returns:
+        Read-only embedding array
+    """
+    key = query.strip().lower()
+    
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(_encode_text_cached, key))
+        _inflight[key] = task
+        task.add_done_callback(partial(_encode_done, key))
+    
+    # Every caller, the first included, shields the shared task, so a
+    # cancelled request never cancels the encode other requests wait on
+    return await asyncio.shield(task)
+
+
+def filter_results_by_caption_score(rows: list[dict], threshold: float) -> list[dict]:
+    """
+    Keep rows whose caption embedding is close enough to the query.
+    
+    caption_score is the cosine between the query embedding and the stored
+    caption embedding, computed in SQL alongside the visual score. Rows
+    without a caption embedding (ingested before caption_emb existed) are
+    dropped, like uncaptioned rows in the GPT filter.
+    
+    Args:
+        rows: Search row dicts
+        threshold: Minimum caption_score
+    
+    Returns:
+        Filtered rows
+    """
+    return [
+        row for row in rows
+        if row['caption_score'] is not None and row['caption_score'] >= threshold
+    ]
+
+
+def filter_results_by_cross_encoder(query: str, rows: list[dict], threshold: float) -> list[dict]:
+    """
+    Keep rows whose caption a local cross-encoder scores as relevant.
+    
+    All captions are scored in batched forward passes; CPU-bound, so call
+    it off the event loop. Uncaptioned rows are dropped, like in the GPT
+    filter.
+    
+    Args:
+        query: Search query text
+        rows: Search row dicts
+        threshold: Minimum cross-encoder score (0.0 to 1.0)
+    
+    Returns:
+        Filtered rows
+    """
+    captioned = [row for row in rows if row['caption'] and row['caption'].get('text')]
+    scores = score_batch(query, [row['caption']['text'] for row in captioned])
+    return [row for row, score in zip(captioned, scores) if score >= threshold]
+
 
 class SearchRequest(BaseModel):
     """Search request."""
@@ -20,7 +220,7 @@ class SearchRequest(BaseModel):
     user_id: str
     top_k: int = 20
     min_score: float = 0.5  # Minimum visual similarity score (0.0 to 1.0)
-    semantic_threshold: float = 0.49  # Minimum semantic similarity for OpenAI filter (0.0 to 1.0)
+    semantic_threshold: float = 0.49  # Minimum caption score for the gpt/cross_encoder filter (0.0 to 1.0)
     video_id: Optional[str] = None  # Optional: search within specific video
 
 
@@ -30,7 +230,7 @@ class SearchResult(BaseModel):
     segment_id: str
     timestamp_ms: int
     score: float
-    preview_url: str
+    preview_url: Optional[str] = None
     caption: Optional[str] = None
 
 
@@ -41,8 +241,10 @@ class SearchResponse(BaseModel):
     count: int
 
 
-@router.post("", response_model=SearchResponse)
-def search_videos(request: SearchRequest):
+# The response is built as plain dicts and returned directly, skipping
+# FastAPI's output validation; SearchResponse still documents the schema.
+@router.post("", response_model=None, responses={200: {"model": SearchResponse}})
+async def search_videos(request: SearchRequest) -> ORJSONResponse:
     """
     Semantic search across video segments.
     
@@ -50,210 +252,112 @@ def search_videos(request: SearchRequest):
         request: SearchRequest with query and filters
     
     Returns:
-        SearchResponse with ranked results
+        SearchResponse-shaped JSON with ranked results
     """
     if not request.query or len(request.query.strip()) == 0:
         raise HTTPException(status_code=400, detail="Query cannot be empty")
     
     # Step 1: Encode query text to vector
     try:
-        query_embedding = encode_text(request.query)
+        query_embedding = await encode_query(request.query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to encode query: {str(e)}")
     
+    # Visual score floor (disabled when <= 0; cosine similarity is >= -1)
+    min_score = request.min_score if request.min_score > 0 else -1.0
+    
     # Step 2: Execute ANN search with pgvector
-    with get_connection() as conn:
-        with conn.cursor() as cur:
+    # Candidates are over-fetched, then collapsed to one segment per
+    # MOMENT_BUCKET_MS window per video and floored by min_score in SQL,
+    # so the DB returns at most top_k moments.
+    async with get_connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
             # Build query with optional video_id filter
             if request.video_id:
                 # Search within specific video
-                sql = """
-                    SELECT 
-                        s.id AS segment_id,
-                        s.video_id,
-                        s.t_start_ms,
-                        s.frame_url,
-                        1 - (s.emb <=> %s::vector) AS score,
-                        s.caption
-                    FROM public.segments s
-                    JOIN public.videos v ON s.video_id = v.id
-                    WHERE v.user_id = %s 
-                      AND v.status = 'ready'
-                      AND s.video_id = %s
-                    ORDER BY s.emb <=> %s::vector
-                    LIMIT %s
-                """
+                sql = SQL_SEARCH_VIDEO
                 params = (
-                    query_embedding.tolist(),
+                    query_embedding,
                     request.user_id,
                     request.video_id,
-                    query_embedding.tolist(),
+                    request.top_k * CANDIDATE_MULTIPLIER,
+                    min_score,
                     request.top_k
                 )
             else:
                 # Search across all user's videos
-                sql = """
-                    SELECT 
-                        s.id AS segment_id,
-                        s.video_id,
-                        s.t_start_ms,
-                        s.frame_url,
-                        1 - (s.emb <=> %s::vector) AS score,
-                        s.caption
-                    FROM public.segments s
-                    JOIN public.videos v ON s.video_id = v.id
-                    WHERE v.user_id = %s 
-                      AND v.status = 'ready'
-                    ORDER BY s.emb <=> %s::vector
-                    LIMIT %s
-                """
+                sql = SQL_SEARCH_ALL
                 params = (
-                    query_embedding.tolist(),
+                    query_embedding,
                     request.user_id,
-                    query_embedding.tolist(),
+                    request.top_k * CANDIDATE_MULTIPLIER,
+                    min_score,
                     request.top_k
                 )
             
-            cur.execute(sql, params)
-            rows = cur.fetchall()
-    
-    # Step 3: Debug logging - show all scores
-    print(f"\n{'='*60}")
-    print(f"🔍 SEARCH: '{request.query}'")
-    print(f"{'='*60}")
-    print(f"Total results from DB: {len(rows)}")
+            await cur.execute(sql, params)
+            rows = await cur.fetchall()
     
-    if rows:
-        print(f"\n📊 Top 10 Results (sorted by score):")
+    # Step 3: Debug logging - show top scores
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "search '%s' (visual threshold %s) -> %d moments",
+            request.query, request.min_score, len(rows)
+        )
         for i, row in enumerate(rows[:10], 1):
-            seg_id, vid_id, ts, url, score, caption_json = row
-            badge = "✓" if score >= request.min_score else "✗"
-            timestamp = f"{ts//60000}:{(ts//1000)%60:02d}"
-            
-            # Extract caption text
-            caption_text = caption_json.get('text', 'no caption') if caption_json else 'no caption'
-            
-            print(f"  {badge} #{i}: score={score:.4f} ({score*100:.1f}%) at {timestamp}")
-            print(f"       Caption: \"{caption_text}\"")
-            print(f"       Video: {str(vid_id)[:8]}...")
-            print(f"       Quality: {'GOOD' if score >= 0.6 else 'FAIR' if score >= 0.5 else 'POOR'}")
+            caption_text = row['caption'].get('text', 'no caption') if row['caption'] else 'no caption'
+            ts = row['t_start_ms']
+            logger.debug(
+                "  #%d: score=%.4f at %d:%02d video=%.8s caption=\"%s\"",
+                i, row['score'], ts // 60000, (ts // 1000) % 60, str(row['video_id']), caption_text
+            )
     
-    # Step 3a: Filter by minimum visual score threshold (optional, can be disabled by setting to 0)
-    if request.min_score > 0:
-        filtered_rows = [(seg_id, vid_id, ts, url, score, caption) for seg_id, vid_id, ts, url, score, caption in rows if score >= request.min_score]
-        print(f"\n✅ Results above visual threshold ({request.min_score}): {len(filtered_rows)}")
+    # Step 4: Apply semantic filtering
+    if settings.SEMANTIC_FILTER == "embedding":
+        moments = filter_results_by_caption_score(rows, settings.SEMANTIC_EMBEDDING_THRESHOLD)
+    elif settings.SEMANTIC_FILTER == "cross_encoder":
+        moments = await asyncio.to_thread(
+            filter_results_by_cross_encoder, request.query, rows, request.semantic_threshold
+        )
     else:
-        filtered_rows = rows
-        print(f"\n✅ Visual threshold disabled, keeping all {len(filtered_rows)} results")
+        moments = await filter_results_by_semantic_similarity(
+            query=request.query,
+            results=rows,
+            threshold=request.semantic_threshold
+        )
     
-    # Step 3b: Apply OpenAI semantic filtering
-    filtered_rows = filter_results_by_semantic_similarity(
-        query=request.query,
-        results=filtered_rows,
-        threshold=request.semantic_threshold
-    )
-    
-    print(f"{'='*60}\n")
+    # Step 5: Generate signed URLs for preview frames (one bulk request)
+    # Expected frame_url format: "frames/user_id/video_id/frame_xxx.jpg"
+    paths = [moment['frame_url'].removeprefix(_FRAMES_BUCKET_PREFIX) for moment in moments]
     
-    # Step 4: Group nearby segments into moments (optional: within 2s = same moment)
-    moments = group_into_moments(filtered_rows, time_threshold_ms=2000)
+    # Check the signed URL cache first so all-hit searches skip the threadpool
+    preview_urls = cached_signed_urls(settings.BUCKET_FRAMES, paths, PREVIEW_URL_EXPIRES_S)
     
-    # Step 5: Generate signed URLs for preview frames
-    results = []
-    for moment in moments[:request.top_k]:
-        segment_id, video_id, timestamp_ms, frame_url, score, caption_json = moment
-        
-        # Extract caption text
-        caption_text = caption_json.get('text') if caption_json else None
-        
-        # Extract bucket and path from frame_url
-        # Expected format: "frames/user_id/video_id/frame_xxx.jpg"
-        if frame_url.startswith(f"{settings.BUCKET_FRAMES}/"):
-            path = frame_url[len(f"{settings.BUCKET_FRAMES}/"):]
-        else:
-            path = frame_url
-        
+    if None in preview_urls:
         try:
-            preview_url = get_signed_url(settings.BUCKET_FRAMES, path, expires_in=3600)
+            preview_urls = await run_in_threadpool(
+                get_signed_urls, settings.BUCKET_FRAMES, paths,
+                expires_in=PREVIEW_URL_EXPIRES_S
+            )
         except Exception as e:
-            print(f"Failed to generate signed URL for {frame_url}: {e}")
-            preview_url = None
-        
-        results.append(SearchResult(
-            video_id=str(video_id),
-            segment_id=str(segment_id),
-            timestamp_ms=timestamp_ms,
-            score=round(score, 4),
-            preview_url=preview_url,
-            caption=caption_text
-        ))
-    
-    return SearchResponse(
-        results=results,
-        query=request.query,
-        count=len(results)
-    )
-
-
-def group_into_moments(
-    segments: List[tuple],
-    time_threshold_ms: int = 2000
-) -> List[tuple]:
-    """
-    Group nearby segments into moments.
-    
-    Args:
-        segments: List of (segment_id, video_id, timestamp_ms, frame_url, score, caption)
-        time_threshold_ms: Max gap between segments to group as same moment
+            logger.warning("Failed to generate signed URLs for %d frames: %s", preview_urls.count(None), e)
     
-    Returns:
-        List of representative segments (one per moment)
-    """
-    if not segments:
-        return []
-    
-    moments = []
-    current_moment = None
-    
-    for seg in segments:
-        segment_id, video_id, timestamp_ms, frame_url, score, caption = seg
+    results = []
+    for moment, preview_url in zip(moments, preview_urls):
+        # Extract caption text
+        caption_text = moment['caption'].get('text') if moment['caption'] else None
         
-        if current_moment is None:
-            # Start first moment
-            current_moment = {
-                'video_id': video_id,
-                'start_ms': timestamp_ms,
-                'end_ms': timestamp_ms,
-                'best_segment': seg,
-                'best_score': score
-            }
-        else:
-            # Check if this segment belongs to current moment
-            same_video = video_id == current_moment['video_id']
-            time_gap = timestamp_ms - current_moment['end_ms']
-            close_in_time = time_gap <= time_threshold_ms
-            
-            if same_video and close_in_time:
-                # Extend current moment
-                current_moment['end_ms'] = timestamp_ms
-                # Keep best scoring segment
-                if score > current_moment['best_score']:
-                    current_moment['best_segment'] = seg
-                    current_moment['best_score'] = score
-            else:
-                # Save current moment and start new one
-                moments.append(current_moment['best_segment'])
-                current_moment = {
-                    'video_id': video_id,
-                    'start_ms': timestamp_ms,
-                    'end_ms': timestamp_ms,
-                    'best_segment': seg,
-                    'best_score': score
-                }
+        results.append({
+            "video_id": str(moment['video_id']),
+            "segment_id": str(moment['segment_id']),
+            "timestamp_ms": moment['t_start_ms'],
+            "score": round(moment['score'], 4),
+            "preview_url": preview_url,
+            "caption": caption_text
+        })
     
-    # Add last moment
-    if current_moment:
-        moments.append(current_moment['best_segment'])
-    
-    return moments
-
+    return ORJSONResponse({
+        "results": results,
+        "query": request.query,
+        "count": len(results)
+    })
@@ -1,22 +1,111 @@
 """Video upload and management endpoints."""
 
 import os
+import sys
 import uuid
-import tempfile
 import threading
+import multiprocessing
+import aiofiles
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from starlette.formparsers import MultiPartParser
+from psycopg.errors import ForeignKeyViolation
+from psycopg.rows import dict_row
 from pydantic import BaseModel
 from typing import Optional, List
 
 from app.db import get_connection
-from worker.ingest_video import ingest_video
-from worker.utils.supabase_io import get_video, get_signed_url
+from worker.ingest_video import ingest_video, _mark_failed
+from worker.utils.supabase_io import (
+    get_signed_urls,
+    bust_signed_url,
+    create_signed_upload_url,
+    download_from_storage,
+    update_video_status
+)
 from app.core.config import settings
 
 
 router = APIRouter(prefix="/v1/videos", tags=["videos"])
 
+# Bytes copied per read when saving an upload to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Bytes per os.sendfile call when the upload is already spooled to disk
+SENDFILE_CHUNK_SIZE = 64 * 1024 * 1024
+
+SQL_GET_VIDEO = """
+    SELECT id, user_id, url, duration_ms, width, height, status, error_msg, created_at, thumbnail_url
+    FROM public.videos
+    WHERE id = %s
+"""
+
+# Direct uploads still "uploading" after this long were abandoned (their
+# signed upload URL, valid for 2 hours, has expired) and are not listed
+PENDING_UPLOAD_TTL_S = 2 * 60 * 60
+
+# ids are cast to text so rows validate straight into VideoResponse.
+# Served by videos_user_created_idx (see README) without a sort
+SQL_LIST_VIDEOS = """
+    SELECT id::text AS id, user_id::text AS user_id, url, duration_ms, width, height, status, error_msg, created_at, thumbnail_url
+    FROM public.videos
+    WHERE user_id = %s
+      AND (status <> 'uploading' OR created_at > NOW() - make_interval(secs => %s))
+    ORDER BY created_at DESC
+    LIMIT %s
+"""
+
+# Largest page list_videos will return; the whole page is signed and
+# serialized in one response, so it is bounded rather than streamed
+MAX_LIST_LIMIT = 500
+
+# Ownership-scoped; user_id compared as text like the old str() check
+SQL_DELETE_VIDEO = """
+    DELETE FROM public.videos
+    WHERE id = %s AND user_id::text = %s
+    RETURNING url, thumbnail_url
+"""
+
+# Row for a direct upload, recorded when its signed URL is issued; ingestion
+# overwrites duration and dimensions once the file is probed
+SQL_CREATE_PENDING_VIDEO = """
+    INSERT INTO public.videos (id, user_id, url, duration_ms, status)
+    VALUES (%s, %s, %s, 0, 'uploading')
+"""
+
+# Claims a direct upload for ingestion exactly once, and only for its owner
+SQL_CLAIM_PENDING_VIDEO = """
+    UPDATE public.videos
+    SET status = 'processing'
+    WHERE id = %s AND user_id::text = %s AND status = 'uploading'
+    RETURNING url
+"""
+
+SQL_RELEASE_PENDING_VIDEO = """
+    UPDATE public.videos
+    SET status = 'uploading'
+    WHERE id = %s AND status = 'processing'
+"""
+
+SQL_VIDEO_EXISTS = """
+    SELECT 1 FROM public.videos
+    WHERE id = %s AND user_id::text = %s
+"""
+
+# Ingestion worker pool (created on first upload, shut down with the app,
+# replaced if a worker dies). Guarded by the lock since job callbacks run
+# on the executor's thread.
+_ingest_executor: Optional[ProcessPoolExecutor] = None
+_ingest_executor_lock = threading.Lock()
+
+# Running + queued ingestion jobs; uploads beyond this get a 503
+_ingest_slots = threading.BoundedSemaphore(settings.INGEST_MAX_PENDING)
+
 
 class VideoResponse(BaseModel):
     """Video record response."""
@@ -41,7 +130,226 @@ class UploadResponse(BaseModel):
     message: str
 
 
-@router.post("/upload", response_model=UploadResponse)
+class DirectUploadRequest(BaseModel):
+    """Request for a signed upload URL."""
+    user_id: str
+    filename: str
+    content_type: str
+
+
+class DirectUploadResponse(BaseModel):
+    """Signed upload URL for a direct-to-storage upload."""
+    video_id: str
+    path: str  # Object path in the videos bucket
+    upload_url: str  # PUT the file here, then call /{video_id}/ingest
+
+
+class IngestRequest(BaseModel):
+    """Start ingestion of a video uploaded directly to storage."""
+    user_id: str
+    path: str
+
+
+def _run_ingestion(temp_path: str, video_id: str, user_id: str) -> None:
+    """
+    Ingest an uploaded video and remove its temp file.
+    Runs in an ingestion worker process.
+    """
+    try:
+        ingest_video(
+            video_path=temp_path,
+            video_id=video_id,
+            user_id=user_id,
+            fps=1.0,
+            batch_size=10,
+            upload_video=True  # Upload original to storage
+        )
+    except Exception as e:
+        print(f"Ingestion failed for {video_id}: {e}")
+    finally:
+        # Cleanup temp file
+        try:
+            os.remove(temp_path)
+        except:
+            pass
+
+
+def _run_storage_ingestion(storage_path: str, video_id: str, user_id: str) -> None:
+    """
+    Download a directly-uploaded video and ingest it.
+    Runs in an ingestion worker process.
+    """
+    file_extension = Path(storage_path).suffix or '.mp4'
+    temp_path = os.path.join(settings.SPOOL_DIR, f"video_{video_id}{file_extension}")
+    
+    try:
+        try:
+            download_from_storage(settings.BUCKET_VIDEOS, storage_path, temp_path)
+        except Exception as e:
+            # ingest_video marks its own failures; this one happens before it
+            _mark_failed(video_id, e)
+            raise
+        
+        ingest_video(
+            video_path=temp_path,
+            video_id=video_id,
+            user_id=user_id,
+            fps=1.0,
+            batch_size=10,
+            storage_path=storage_path  # Original is already in storage
+        )
+    except Exception as e:
+        print(f"Ingestion failed for {video_id}: {e}")
+    finally:
+        try:
+            os.remove(temp_path)
+        except:
+            pass
+
+
+def _ingestion_done(executor: ProcessPoolExecutor, video_id: str, future: Future) -> None:
+    """
+    Free the job's ingestion slot (runs on the executor's thread).
+    
+    If the worker process died (e.g. OOM-killed while loading models), the
+    job never got to record its failure, so the video is marked as error
+    here, and the broken pool is dropped so the next upload gets a new one.
+    """
+    _ingest_slots.release()
+    if future.cancelled() or not future.exception():
+        return
+    
+    error = future.exception()
+    print(f"Ingestion worker crashed: {error}")
+    
+    if isinstance(error, BrokenProcessPool):
+        _discard_ingest_executor(executor)
+        try:
+            update_video_status(video_id, status="error", error_msg="Ingestion worker crashed")
+        except Exception as e:
+            print(f"Failed to mark {video_id} as error: {e}")
+
+
+def get_ingest_executor() -> ProcessPoolExecutor:
+    """
+    Get or create the ingestion worker pool.
+    
+    Workers are long-lived processes, so models loaded by the first job
+    stay warm for later ones. "spawn" avoids forking the API process with
+    its event loop and threads.
+    
+    Returns:
+        ProcessPoolExecutor with INGEST_WORKERS processes
+    """
+    global _ingest_executor
+    
+    with _ingest_executor_lock:
+        if _ingest_executor is None:
+            _ingest_executor = ProcessPoolExecutor(
+                max_workers=settings.INGEST_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            print(f"✅ Ingestion worker pool created (workers={settings.INGEST_WORKERS})")
+        
+        return _ingest_executor
+
+
+def _discard_ingest_executor(executor: ProcessPoolExecutor) -> None:
+    """Drop a broken worker pool so get_ingest_executor creates a new one."""
+    global _ingest_executor
+    
+    with _ingest_executor_lock:
+        if _ingest_executor is executor:
+            _ingest_executor = None
+            print("⚠️  Ingestion worker pool broken; it will be recreated")
+    executor.shutdown(wait=False)
+
+
+def _submit_ingestion(fn, video_id: str, *args) -> Future:
+    """
+    Queue an ingestion job for video_id on the worker pool.
+    
+    A pool broken by a dead worker is replaced and the submit retried once.
+    The job's slot is released (and a crash recorded) by _ingestion_done.
+    
+    Args:
+        fn: Job function, run in a worker process as fn(*args)
+        video_id: Video the job ingests
+        *args: Arguments for fn
+    
+    Returns:
+        The job's Future
+    """
+    executor = get_ingest_executor()
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool:
+        _discard_ingest_executor(executor)
+        executor = get_ingest_executor()
+        future = executor.submit(fn, *args)
+    
+    future.add_done_callback(partial(_ingestion_done, executor, video_id))
+    return future
+
+
+def shutdown_ingest_executor() -> None:
+    """Stop the ingestion workers, dropping jobs that have not started."""
+    global _ingest_executor
+    
+    with _ingest_executor_lock:
+        executor, _ingest_executor = _ingest_executor, None
+    if executor:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _spooled_fileno(file: UploadFile) -> Optional[int]:
+    """
+    Return the fd of an upload Starlette has rolled over to disk.
+    
+    Returns None when zero-copy isn't possible: non-Linux (file-to-file
+    sendfile is Linux-only), or the upload is still held in memory.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    # Starlette spools parts to SpooledTemporaryFile(max_size=spool_max_size),
+    # which rolls over to disk once it holds more than that
+    if file.size is None or file.size <= MultiPartParser.spool_max_size:
+        return None
+    try:
+        file.file.flush()
+        return file.file.fileno()
+    except (AttributeError, OSError):
+        return None
+
+
+def _sendfile_copy(src_fd: int, dst_path: str) -> None:
+    """Copy src_fd (from offset 0) to dst_path with os.sendfile, without user-space buffers."""
+    with open(dst_path, "wb") as dst:
+        offset = 0
+        while sent := os.sendfile(dst.fileno(), src_fd, offset, SENDFILE_CHUNK_SIZE):
+            offset += sent
+
+
+def _is_uuid(value: str) -> bool:
+    """True if value parses as a UUID (ids are uuid columns)."""
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _reserve_ingest_slot() -> None:
+    """Take an ingestion slot, or fail with 503 when the workers are saturated."""
+    if not _ingest_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Too many videos processing. Please retry shortly.",
+            headers={"Retry-After": "30"}
+        )
+
+
+@router.post("/upload", response_model=UploadResponse, status_code=202)
 async def upload_video(
     file: UploadFile = File(...),
     user_id: str = Form(...)
@@ -60,43 +368,32 @@ async def upload_video(
     if not file.content_type or not file.content_type.startswith('video/'):
         raise HTTPException(status_code=400, detail="File must be a video")
     
+    # Reserve an ingestion slot before spooling the upload and queueing it
+    # (Starlette has already received the body by now; a full queue turns
+    # it away before it is copied to SPOOL_DIR)
+    _reserve_ingest_slot()
+    
     # Generate video ID
     video_id = str(uuid.uuid4())
     
-    # Save uploaded file to temp location
-    temp_dir = tempfile.mkdtemp()
+    # Save uploaded file to the spool directory (names are unique per video_id)
     file_extension = Path(file.filename).suffix or '.mp4'
-    temp_path = os.path.join(temp_dir, f"video_{video_id}{file_extension}")
+    temp_path = os.path.join(settings.SPOOL_DIR, f"video_{video_id}{file_extension}")
     
     try:
-        # Save uploaded file
-        with open(temp_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
-        # Start ingestion in background thread
-        def run_ingestion():
-            try:
-                ingest_video(
-                    video_path=temp_path,
-                    video_id=video_id,
-                    user_id=user_id,
-                    fps=1.0,
-                    batch_size=10,
-                    upload_video=True  # Upload original to storage
-                )
-            except Exception as e:
-                print(f"Ingestion failed for {video_id}: {e}")
-            finally:
-                # Cleanup temp file
-                try:
-                    os.remove(temp_path)
-                    os.rmdir(temp_dir)
-                except:
-                    pass
+        # Starlette has already spooled large uploads to a temp file; copy
+        # that kernel-side when possible, otherwise in fixed-size chunks so
+        # memory stays flat (aiofiles keeps disk writes off the event loop)
+        spooled_fd = _spooled_fileno(file)
+        if spooled_fd is not None:
+            await run_in_threadpool(_sendfile_copy, spooled_fd, temp_path)
+        else:
+            async with aiofiles.open(temp_path, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
         
-        thread = threading.Thread(target=run_ingestion, daemon=True)
-        thread.start()
+        # Queue ingestion on the worker pool
+        _submit_ingestion(_run_ingestion, video_id, temp_path, video_id, user_id)
         
         return UploadResponse(
             video_id=video_id,
@@ -107,16 +404,143 @@ async def upload_video(
         
     except Exception as e:
         # Cleanup on error
+        _ingest_slots.release()
         try:
             os.remove(temp_path)
-            os.rmdir(temp_dir)
         except:
             pass
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+@router.post("/upload_url", response_model=DirectUploadResponse)
+async def create_upload_url(request: DirectUploadRequest):
+    """
+    Get a signed URL so the client can upload straight to storage.
+    
+    The file never passes through the API: the client PUTs it to
+    upload_url, then calls POST /{video_id}/ingest with the returned path.
+    The video is recorded here with status "uploading", so only this user
+    can start its ingestion.
+    
+    Args:
+        request: DirectUploadRequest with user_id, filename and content_type
+    
+    Returns:
+        DirectUploadResponse with video_id, path and upload_url
+    """
+    if not request.content_type.startswith('video/'):
+        raise HTTPException(status_code=400, detail="File must be a video")
+    
+    if not _is_uuid(request.user_id):
+        raise HTTPException(status_code=400, detail="Invalid user_id")
+    
+    video_id = str(uuid.uuid4())
+    file_extension = Path(request.filename).suffix or '.mp4'
+    path = f"{request.user_id}/{video_id}/video_{video_id}{file_extension}"
+    
+    try:
+        upload_url = await run_in_threadpool(
+            create_signed_upload_url, settings.BUCKET_VIDEOS, path
+        )
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to create upload URL: {str(e)}")
+    
+    try:
+        async with get_connection() as conn:
+            await conn.execute(
+                SQL_CREATE_PENDING_VIDEO,
+                (video_id, request.user_id, f"{settings.BUCKET_VIDEOS}/{path}")
+            )
+            await conn.commit()
+    except ForeignKeyViolation:
+        # videos.user_id references auth.users
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return DirectUploadResponse(video_id=video_id, path=path, upload_url=upload_url)
+
+
+@router.post("/{video_id}/ingest", response_model=UploadResponse, status_code=202)
+async def ingest_uploaded_video(video_id: str, request: IngestRequest):
+    """
+    Trigger ingestion for a video uploaded through a signed upload URL.
+    
+    The video must have been created by /upload_url for this user and not
+    yet ingested (404 otherwise, 409 if it was already started).
+    
+    Args:
+        video_id: Video UUID from /upload_url
+        request: IngestRequest with user_id and the storage path
+    
+    Returns:
+        UploadResponse with video_id and status
+    """
+    if not _is_uuid(video_id):
+        raise HTTPException(status_code=400, detail="Invalid video_id")
+    
+    # Only paths handed out by /upload_url for this user and video
+    if not request.path.startswith(f"{request.user_id}/{video_id}/"):
+        raise HTTPException(status_code=400, detail="Path does not match video")
+    
+    _reserve_ingest_slot()
+    
+    try:
+        async with get_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(SQL_CLAIM_PENDING_VIDEO, (video_id, request.user_id))
+                claimed = await cur.fetchone()
+                if not claimed:
+                    await cur.execute(SQL_VIDEO_EXISTS, (video_id, request.user_id))
+                    exists = await cur.fetchone()
+            await conn.commit()
+    except Exception:
+        _ingest_slots.release()
+        raise
+    
+    if not claimed:
+        _ingest_slots.release()
+        if exists:
+            raise HTTPException(status_code=409, detail="Video is already being ingested")
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    # The recorded object, not the client's copy of its path
+    storage_path = claimed[0].split('/', 1)[1]
+    
+    try:
+        _submit_ingestion(_run_storage_ingestion, video_id, storage_path, video_id, request.user_id)
+    except Exception as e:
+        _ingest_slots.release()
+        # Let the client retry the ingest call
+        async with get_connection() as conn:
+            await conn.execute(SQL_RELEASE_PENDING_VIDEO, (video_id,))
+            await conn.commit()
+        raise HTTPException(status_code=500, detail=f"Failed to queue ingestion: {str(e)}")
+    
+    return UploadResponse(
+        video_id=video_id,
+        user_id=request.user_id,
+        status="processing",
+        message="Video queued for processing."
+    )
+
+
+async def _fetch_video(video_id: str) -> Optional[dict]:
+    """
+    Get a video record through the API connection pool.
+    
+    Args:
+        video_id: Video UUID
+    
+    Returns:
+        Video record dict or None if not found
+    """
+    async with get_connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(SQL_GET_VIDEO, (video_id,))
+            return await cur.fetchone()
+
+
 @router.get("/{video_id}", response_model=VideoResponse)
-def get_video_details(video_id: str, user_id: str):
+async def get_video_details(video_id: str, user_id: str):
     """
     Get video details by ID.
     
@@ -127,7 +551,7 @@ def get_video_details(video_id: str, user_id: str):
     Returns:
         VideoResponse with video details
     """
-    video = get_video(video_id)
+    video = await _fetch_video(video_id)
     
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
@@ -136,29 +560,10 @@ def get_video_details(video_id: str, user_id: str):
     if str(video['user_id']) != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    # Generate signed URL for thumbnail if it exists
-    thumbnail_url = None
-    if video.get('thumbnail_url'):
-        try:
-            # Split bucket and path: "frames/user_id/video_id/thumbnail.jpg" -> bucket="frames", path="user_id/video_id/thumbnail.jpg"
-            parts = video['thumbnail_url'].split('/', 1)
-            if len(parts) == 2:
-                bucket, path = parts
-                thumbnail_url = get_signed_url(bucket, path, expires_in=3600)
-        except Exception as e:
-            print(f"Failed to generate signed URL for thumbnail: {e}")
-    
-    # Generate signed URL for video
-    video_url = None
-    if video.get('url'):
-        try:
-            # Split bucket and path: "videos/user_id/video_id/filename" -> bucket="videos", path="user_id/video_id/filename"
-            parts = video['url'].split('/', 1)
-            if len(parts) == 2:
-                bucket, path = parts
-                video_url = get_signed_url(bucket, path, expires_in=3600)
-        except Exception as e:
-            print(f"Failed to generate signed URL for video: {e}")
+    # Generate signed URLs for thumbnail and video
+    thumbnail_url, video_url = await run_in_threadpool(
+        _sign_storage_refs, [video['thumbnail_url'], video['url']]
+    )
     
     return VideoResponse(
         id=str(video['id']),
@@ -175,104 +580,75 @@ def get_video_details(video_id: str, user_id: str):
     )
 
 
-def _generate_signed_urls_for_video(row: tuple) -> dict:
+def _sign_storage_refs(refs: list[Optional[str]]) -> list[Optional[str]]:
     """
-    Generate signed URLs for a single video (thumbnail + video).
-    Helper function for parallel execution.
+    Sign "bucket/path" storage references with one bulk request per bucket.
     
     Args:
-        row: Database row (id, user_id, url, duration_ms, width, height, status, error_msg, created_at, thumbnail_url)
+        refs: Storage references like "frames/user_id/video_id/thumbnail.jpg" (None allowed)
     
     Returns:
-        Dict with video data and signed URLs
+        Signed URLs in the same order as refs (None where missing or signing failed)
     """
-    video_id, user_id, url, duration_ms, width, height, status, error_msg, created_at, thumbnail_url_raw = row
-    
-    thumbnail_url = None
-    video_url = None
+    paths_by_bucket = {}
+    for ref in refs:
+        if ref and '/' in ref:
+            bucket, path = ref.split('/', 1)
+            paths_by_bucket.setdefault(bucket, []).append(path)
     
-    # Generate signed URL for thumbnail if it exists
-    if thumbnail_url_raw:
+    signed = {}
+    for bucket, paths in paths_by_bucket.items():
         try:
-            parts = thumbnail_url_raw.split('/', 1)
-            if len(parts) == 2:
-                bucket, path = parts
-                thumbnail_url = get_signed_url(bucket, path, expires_in=3600)
+            for path, signed_url in zip(paths, get_signed_urls(bucket, paths, expires_in=3600)):
+                signed[f"{bucket}/{path}"] = signed_url
         except Exception as e:
-            print(f"Failed to generate signed URL for thumbnail: {e}")
+            print(f"Failed to generate signed URLs for bucket '{bucket}': {e}")
     
-    # Generate signed URL for video
-    if url:
-        try:
-            parts = url.split('/', 1)
-            if len(parts) == 2:
-                bucket, path = parts
-                video_url = get_signed_url(bucket, path, expires_in=3600)
-        except Exception as e:
-            print(f"Failed to generate signed URL for video: {e}")
-    
-    return {
-        'id': str(video_id),
-        'user_id': str(user_id),
-        'url': url,
-        'duration_ms': duration_ms,
-        'width': width,
-        'height': height,
-        'status': status,
-        'error_msg': error_msg,
-        'created_at': created_at.isoformat() if created_at else None,
-        'thumbnail_url': thumbnail_url,
-        'video_url': video_url
-    }
-
-
-@router.get("", response_model=List[VideoResponse])
-def list_videos(user_id: str, limit: int = 50):
+    return [signed.get(ref) if ref else None for ref in refs]
+
+
+@router.get("", response_model=None, responses={200: {"model": List[VideoResponse]}})
+async def list_videos(user_id: str, limit: int = Query(50, ge=1, le=MAX_LIST_LIMIT)) -> ORJSONResponse:
     """
     List all videos for a user.
-    Uses sequential signed URL generation (optimized for Supabase connection limits).
+    Signed URLs are generated in bulk (one Supabase request per bucket).
     
     Args:
         user_id: User UUID
-        limit: Max number of videos to return
+        limit: Max number of videos to return (1 to MAX_LIST_LIMIT)
     
     Returns:
         List of VideoResponse
     """
     # Step 1: Get data from database and close connection immediately
     rows = []
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT id, user_id, url, duration_ms, width, height, status, error_msg, created_at, thumbnail_url
-                FROM public.videos
-                WHERE user_id = %s
-                ORDER BY created_at DESC
-                LIMIT %s
-            """, (user_id, limit))
+    async with get_connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(SQL_LIST_VIDEOS, (user_id, PENDING_UPLOAD_TTL_S, limit))
             
-            rows = cur.fetchall()
+            rows = await cur.fetchall()
     # Connection is now closed
     
     if not rows:
-        return []
+        return ORJSONResponse([])
     
-    # Step 2: Generate signed URLs sequentially (simpler, avoids threading issues)
-    videos = []
-    for row in rows:
-        try:
-            video_data = _generate_signed_urls_for_video(row)
-            videos.append(VideoResponse(**video_data))
-        except Exception as e:
-            print(f"Error generating signed URLs for video: {e}")
-            # Skip this video if URL generation fails
-            continue
+    # Step 2: Sign all thumbnails and videos in one request per bucket
+    signed = await run_in_threadpool(
+        _sign_storage_refs, [row['thumbnail_url'] for row in rows] + [row['url'] for row in rows]
+    )
+    thumbnail_urls, video_urls = signed[:len(rows)], signed[len(rows):]
+    
+    # Rows already have VideoResponse's fields (ids cast to text in SQL), so
+    # they go straight to orjson, which also encodes created_at natively
+    for row, thumbnail_url, video_url in zip(rows, thumbnail_urls, video_urls):
+        row['thumbnail_url'] = thumbnail_url
+        row['video_url'] = video_url
     
-    return videos
+    return ORJSONResponse(rows)
 
 
 @router.delete("/{video_id}")
-def delete_video(video_id: str, user_id: str):
+async def delete_video(video_id: str, user_id: str):
     """
     Delete video and all associated data.
     
@@ -283,22 +659,21 @@ def delete_video(video_id: str, user_id: str):
     Returns:
         Success message
     """
-    # Verify ownership
-    video = get_video(video_id)
-    if not video:
-        raise HTTPException(status_code=404, detail="Video not found")
+    # Delete only if owned by user_id (cascade will delete segments).
+    # Missing and not-owned videos both return 404 so ownership isn't leaked.
+    async with get_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(SQL_DELETE_VIDEO, (video_id, user_id))
+            deleted = await cur.fetchone()
+            await conn.commit()
     
-    if str(video['user_id']) != user_id:
-        raise HTTPException(status_code=403, detail="Access denied")
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Video not found")
     
-    # Delete from database (cascade will delete segments)
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                DELETE FROM public.videos
-                WHERE id = %s
-            """, (video_id,))
-            conn.commit()
+    # Don't keep serving signed URLs for the deleted video's objects
+    for ref in deleted:
+        if ref and '/' in ref:
+            bust_signed_url(*ref.split('/', 1))
     
     return {"message": "Video deleted successfully", "video_id": video_id}
 
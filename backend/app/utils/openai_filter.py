@@ -1,14 +1,39 @@
 """Semantic filtering utilities using OpenAI GPT."""
 
-from openai import OpenAI
+from cachetools import LRUCache
+from functools import lru_cache
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from openai.types.chat import ChatCompletion
 from typing import Optional
 from app.core.config import settings
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.utils.semantic_cache import lookup_scores, store_scores
+import asyncio
+import atexit
+import httpx
+import json
+import logging
+import math
+import re
 import time
+import weakref
 
 
-# Global OpenAI client
+logger = logging.getLogger(__name__)
+
+
+# Global OpenAI clients (sync for scripts, async for the API)
 _client: Optional[OpenAI] = None
+_async_client: Optional[AsyncOpenAI] = None
+
+# Shared HTTP settings: keep-alive pool sized for the filter's fan-out, and
+# a short timeout instead of the SDK's 10-minute default so a stuck request
+# fails into the per-caption fallback quickly
+OPENAI_HTTP_LIMITS = httpx.Limits(
+    max_connections=128,
+    max_keepalive_connections=64,
+    keepalive_expiry=30.0
+)
+OPENAI_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
 
 
 def get_openai_client() -> OpenAI:
@@ -23,37 +48,104 @@ def get_openai_client() -> OpenAI:
     if _client is None:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not set in environment variables")
-        _client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        _client = OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=DefaultHttpxClient(limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT)
+        )
+        atexit.register(_client.close)
         print("✅ OpenAI client initialized")
     
     return _client
 
 
-
-
-def calculate_text_similarity(query: str, caption: str) -> float:
+def get_async_openai_client() -> AsyncOpenAI:
     """
-    Calculate semantic similarity using OpenAI GPT model with prompt.
-    
-    Args:
-        query: Search query text (e.g., "dog on snow")
-        caption: Video frame caption text (e.g., "a brown dog is standing in the snow")
+    Get or create async OpenAI client.
     
     Returns:
-        Similarity score (0.0 to 1.0)
+        AsyncOpenAI client instance
     """
-    try:
-        client = get_openai_client()
-        
-        # Create prompt asking GPT to match search term with caption
-        prompt = f"""You are an expert video search assistant. Score how well a search term matches a video caption.
+    global _async_client
+    
+    if _async_client is None:
+        if not settings.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY not set in environment variables")
+        _async_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=DefaultAsyncHttpxClient(limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT)
+        )
+        print("✅ Async OpenAI client initialized")
+    
+    return _async_client
+
+
+async def close_async_openai_client() -> None:
+    """Close the async client's connections (call on app shutdown)."""
+    global _async_client
+    if _async_client:
+        await _async_client.close()
+        _async_client = None
 
-Return ONLY an integer from 0 to 100.
 
-Search Term: "{query}"
-Video Caption: "{caption}"
+class _RateLimiter:
+    """Token bucket holding up to one minute's budget, refilled continuously."""
+    
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until amount is available, then take it (callers queue in order)."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) / self.rate)
+
 
-Follow these steps before scoring:
+# (request, token) limiters for async GPT calls, per event loop: each
+# limiter's asyncio.Lock is bound to the loop that first waits on it, so
+# scripts calling asyncio.run() more than once get fresh ones. Entries go
+# away with their loop.
+_limiters = weakref.WeakKeyDictionary()
+
+
+async def _throttle(request: dict) -> None:
+    """
+    Wait for rate-limit budget (OPENAI_MAX_RPM / OPENAI_MAX_TPM) for a request.
+    
+    Tokens are estimated as prompt characters / 4 plus max_tokens.
+    """
+    if not (settings.OPENAI_MAX_RPM or settings.OPENAI_MAX_TPM):
+        return
+    
+    loop = asyncio.get_running_loop()
+    limiters = _limiters.get(loop)
+    if limiters is None:
+        limiters = _limiters[loop] = (
+            _RateLimiter(settings.OPENAI_MAX_RPM),
+            _RateLimiter(settings.OPENAI_MAX_TPM)
+        )
+    rpm_limiter, tpm_limiter = limiters
+    
+    if settings.OPENAI_MAX_RPM:
+        await rpm_limiter.acquire()
+    
+    if settings.OPENAI_MAX_TPM:
+        prompt_chars = sum(len(message["content"]) for message in request["messages"])
+        await tpm_limiter.acquire(prompt_chars // 4 + request["max_tokens"])
+
+
+# Matching rules shared by the single and batched scoring prompts
+_SCORING_RULES = """Follow these steps before scoring:
 1) Extract: SUBJECT(S), ACTION(S), OBJECT(S), CONTEXT/ATTRIBUTES (location, scene, adjectives) from BOTH query and caption.
 2) Normalize terms using synonyms, lemmatization, and category parents (hypernyms). Examples:
    - couple ≈ man+woman ≈ two people ≈ pair
@@ -76,101 +168,452 @@ SCORING BANDS:
 - 85–94: Strong: same core subject(s); action/object are synonyms or very close.
 - 70–84: Good: main subject matches; action OR object related/sibling; context may differ.
 - 50–69: Partial: related domain; only some elements match (e.g., subject matches; object is category sibling; action neutral).
-- 0–49: Poor: different subjects or clearly unrelated.
+- 0–49: Poor: different subjects or clearly unrelated."""
 
-Output: integer score 0–100 ONLY.
+# System prompts carry everything static (role, rules, output format) so
+# the prefix is identical on every call and OpenAI's prompt cache can reuse
+# it; the user message holds only the query and caption(s)
+_SINGLE_SYSTEM_PROMPT = f"""You are an expert video search assistant. Score how well a search term matches a video caption.
 
-Your response (number only):"""
+{_SCORING_RULES}
 
-        # Call GPT-4o-mini (fast and cheap)
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a precise video search matching assistant. Respond only with a number 0-100."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0,  # Deterministic
-            max_tokens=10   # We only need a number
-        )
-        
-        # Extract score from response
-        score_text = response.choices[0].message.content.strip()
-        
-        # Parse score (handle cases like "85", "85%", etc.)
-        score_text = score_text.replace('%', '').strip()
-        score = float(score_text) / 100.0  # Convert to 0-1 range
-        
-        # Clamp to valid range
-        score = max(0.0, min(1.0, score))
-        
+Output: integer score 0–100 ONLY. Respond only with a number, no other text."""
+
+_BATCH_SYSTEM_PROMPT = f"""You are an expert video search assistant. Score how well a search term matches each numbered video caption.
+
+{_SCORING_RULES}
+
+Output: a JSON object {{"scores": [{{"i": <caption number>, "s": <integer score 0-100>}}, ...]}} with one entry per caption. Respond only with JSON."""
+
+# Max captions scored per batched request (keeps prompt and output small)
+BATCH_SIZE = 50
+
+# Max GPT requests in flight per filter call
+MAX_CONCURRENT_REQUESTS = 20
+
+# Seconds between status checks of a Batch API job
+BATCH_API_POLL_INTERVAL_S = 30
+
+# GPT scores keyed by normalized (query, caption). Only successful scores
+# are stored, so a failed call is retried next time. Only touched from the
+# event loop (or a single script thread), so no lock is needed.
+_score_cache = LRUCache(maxsize=10_000)
+
+
+def _score_key(query: str, caption: str) -> tuple[str, str]:
+    """Normalize a (query, caption) pair for the score cache."""
+    return (query.strip().lower(), caption.strip().lower())
+
+
+def _cached_score(query: str, caption: str) -> Optional[float]:
+    """Score known without a GPT call (cached, identical or empty text), else None."""
+    q, c = _score_key(query, caption)
+    if not q or not c:
+        return 0.0
+    if q == c:
+        return 1.0
+    return _score_cache.get((q, c))
+
+
+# Captions whose content words overlap the query's at least this much
+# (Jaccard) are accepted without a GPT call
+LEXICAL_ACCEPT_JACCARD = 0.6
+
+# Long captions sharing no content word with the query are rejected without
+# a GPT call, but only if their stored caption embedding (caption_score,
+# which does see synonyms) is also below this. Rows without one always go
+# to GPT.
+LEXICAL_REJECT_MIN_TOKENS = 10
+LEXICAL_REJECT_MAX_CAPTION_SCORE = 0.7
+
+_STOPWORDS = frozenset({
+    "a", "an", "the", "and", "or", "of", "in", "on", "at", "to", "with",
+    "is", "are", "was", "be", "its", "it", "for", "by", "from", "into", "there"
+})
+
+
+@lru_cache(maxsize=10_000)
+def _content_tokens(text: str) -> frozenset[str]:
+    """Lowercase word tokens of text, minus stopwords."""
+    return frozenset(re.findall(r"[a-z]+", text.lower())) - _STOPWORDS
+
+
+def lexical_overlap(query: str, caption: str) -> float:
+    """Jaccard similarity between the content words of query and caption."""
+    q, c = _content_tokens(query), _content_tokens(caption)
+    if not q or not c:
+        return 0.0
+    return len(q & c) / len(q | c)
+
+
+def _lexical_reject(query: str, caption: str, caption_score: Optional[float]) -> bool:
+    """True for captions that clearly don't match (see LEXICAL_REJECT_*)."""
+    return (
+        caption_score is not None
+        and caption_score < LEXICAL_REJECT_MAX_CAPTION_SCORE
+        and len(caption.split()) > LEXICAL_REJECT_MIN_TOKENS
+        and not (_content_tokens(query) & _content_tokens(caption))
+    )
+
+
+def _similarity_request(query: str, caption: str) -> dict:
+    """Build chat.completions.create kwargs for scoring one caption."""
+    return dict(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": _SINGLE_SYSTEM_PROMPT},
+            {"role": "user", "content": f'Search Term: "{query}"\nVideo Caption: "{caption}"\nAnswer:'}
+        ],
+        temperature=0,  # Deterministic
+        # Integers 0-100 are single tokens in the GPT-4o tokenizer, so one
+        # decoding step yields the score and its alternatives
+        max_tokens=1,
+        logprobs=True,
+        top_logprobs=10
+    )
+
+
+_SCORE_RE = re.compile(r"\d{1,3}")
+
+
+def _parse_similarity(response) -> float:
+    """
+    Turn a single-token score reply into the 0-1 range.
+    
+    Uses the probability-weighted mean of the numeric candidates in
+    top_logprobs, which is smoother than the single argmax token. Falls back
+    to parsing the reply text (e.g. "85", "85%", "Score: 85.") when logprobs
+    are missing.
+    """
+    choice = response.choices[0]
+    logprobs = choice.logprobs.content if choice.logprobs else None
+    if logprobs:
+        weighted = total = 0.0
+        for candidate in logprobs[0].top_logprobs:
+            token = candidate.token.strip()
+            if token.isdigit() and int(token) <= 100:
+                p = math.exp(candidate.logprob)
+                weighted += p * int(token)
+                total += p
+        if total > 0:
+            return max(0.0, min(1.0, weighted / total / 100.0))
+    
+    # First number in the reply, so "87", "87%" and "Score: 87." all parse
+    match = _SCORE_RE.search(choice.message.content or "")
+    if match is None:
+        # Raise rather than return 0.0 so the reply isn't cached as a score
+        raise ValueError(f"No score in reply: {choice.message.content!r}")
+    
+    # Clamp to valid range
+    return max(0.0, min(1.0, int(match.group()) / 100.0))
+
+
+def calculate_text_similarity(query: str, caption: str) -> float:
+    """
+    Calculate semantic similarity using OpenAI GPT model with prompt.
+    
+    Args:
+        query: Search query text (e.g., "dog on snow")
+        caption: Video frame caption text (e.g., "a brown dog is standing in the snow")
+    
+    Returns:
+        Similarity score (0.0 to 1.0)
+    """
+    score = _cached_score(query, caption)
+    if score is not None:
+        return score
+    key = _score_key(query, caption)
+    
+    try:
+        client = get_openai_client()
+        response = client.chat.completions.create(**_similarity_request(query, caption))
+        score = _parse_similarity(response)
+        _score_cache[key] = score
         return score
     
     except Exception as e:
-        print(f"⚠️  OpenAI API error: {e}")
+        logger.warning("OpenAI API error: %s", e)
         # If OpenAI fails, return 0 (don't filter)
         return 0.0
 
 
-def _process_single_result(query: str, result: tuple, index: int, threshold: float) -> dict:
+async def calculate_text_similarity_async(
+    query: str,
+    caption: str,
+    semaphore: asyncio.Semaphore
+) -> float:
     """
-    Process a single result with OpenAI filtering.
-    Helper function for parallel execution.
+    Async calculate_text_similarity, bounded by semaphore.
     
     Args:
-        query: Search query
-        result: (segment_id, video_id, timestamp_ms, frame_url, visual_score, caption_json)
-        index: Result index (1-based for display)
-        threshold: Similarity threshold
+        query: Search query text
+        caption: Video frame caption text
+        semaphore: Limits concurrent GPT requests
     
     Returns:
-        Dict with result data and semantic score
-    """
-    segment_id, video_id, timestamp_ms, frame_url, visual_score, caption_json = result
-    
-    # Extract caption text
-    caption_text = caption_json.get('text', '') if caption_json else ''
-    
-    if not caption_text:
-        return {
-            'result': result,
-            'index': index,
-            'caption_text': caption_text,
-            'semantic_score': 0.0,
-            'passed': False,
-            'skipped': True
-        }
-    
-    # Calculate semantic similarity (OpenAI call happens here)
-    semantic_score = calculate_text_similarity(query, caption_text)
-    
-    # Determine if we keep this result
-    passed = semantic_score >= threshold
-    
-    return {
-        'result': result,
-        'index': index,
-        'caption_text': caption_text,
-        'semantic_score': semantic_score,
-        'passed': passed,
-        'skipped': False
-    }
+        Similarity score (0.0 to 1.0)
+    """
+    score = _cached_score(query, caption)
+    if score is not None:
+        return score
+    key = _score_key(query, caption)
+    
+    try:
+        client = get_async_openai_client()
+        request = _similarity_request(query, caption)
+        async with semaphore:
+            await _throttle(request)
+            response = await client.chat.completions.create(**request)
+        score = _parse_similarity(response)
+        _score_cache[key] = score
+        return score
+    
+    except Exception as e:
+        logger.warning("OpenAI API error: %s", e)
+        return 0.0
+
+
+def _batch_request(query: str, captions: list[str]) -> dict:
+    """Build chat.completions.create kwargs for scoring numbered captions."""
+    numbered = "\n".join(f'{j}. "{caption}"' for j, caption in enumerate(captions))
+    return dict(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": _BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": f'Search Term: "{query}"\nVideo Captions:\n{numbered}'}
+        ],
+        response_format={"type": "json_object"},
+        temperature=0,  # Deterministic
+        max_tokens=20 * len(captions) + 20  # ~12 tokens per score entry
+    )
+
+
+def _apply_batch_scores(response, query: str, captions: list[str], scores: list, targets: list[int]) -> None:
+    """
+    Parse a batched JSON reply into scores (and the score cache).
+    
+    targets[j] is the index in scores for caption number j of the request.
+    Captions the model left out keep their None score.
+    """
+    data = json.loads(response.choices[0].message.content)
+    for item in data["scores"]:
+        j = int(item["i"])
+        if 0 <= j < len(targets):
+            i = targets[j]
+            scores[i] = max(0.0, min(1.0, float(item["s"]) / 100.0))
+            _score_cache[_score_key(query, captions[i])] = scores[i]
+
+
+def calculate_text_similarities_batch(query: str, captions: list[str]) -> list[float]:
+    """
+    Score many captions against one query, BATCH_SIZE captions per GPT request.
+    
+    Synchronous counterpart of score_captions_batch for scripts. Captions the
+    batched reply misses are scored one at a time.
+    
+    Args:
+        query: Search query text
+        captions: Caption texts
+    
+    Returns:
+        Similarity scores (0.0 to 1.0), aligned with captions
+    """
+    scores = [_cached_score(query, caption) for caption in captions]
+    uncached = [i for i, score in enumerate(scores) if score is None]
+    
+    for start in range(0, len(uncached), BATCH_SIZE):
+        targets = uncached[start:start + BATCH_SIZE]
+        try:
+            client = get_openai_client()
+            response = client.chat.completions.create(
+                **_batch_request(query, [captions[i] for i in targets])
+            )
+            _apply_batch_scores(response, query, captions, scores, targets)
+        except Exception as e:
+            logger.warning("Batched OpenAI scoring failed, falling back to per-caption calls: %s", e)
+    
+    return [
+        score if score is not None else calculate_text_similarity(query, caption)
+        for caption, score in zip(captions, scores)
+    ]
 
 
-def filter_results_by_semantic_similarity(
+def calculate_text_similarity_batch(pairs: list[tuple[str, str]]) -> list[float]:
+    """
+    Score many (query, caption) pairs with one batched GPT request per query.
+    
+    Args:
+        pairs: (query, caption) tuples
+    
+    Returns:
+        Similarity scores (0.0 to 1.0), aligned with pairs
+    """
+    # Group pair indices by query so each query's captions share a request
+    by_query: dict[str, list[int]] = {}
+    for i, (query, _) in enumerate(pairs):
+        by_query.setdefault(query, []).append(i)
+    
+    scores = [0.0] * len(pairs)
+    for query, indices in by_query.items():
+        group_scores = calculate_text_similarities_batch(query, [pairs[i][1] for i in indices])
+        for i, score in zip(indices, group_scores):
+            scores[i] = score
+    return scores
+
+
+def filter_results_by_semantic_similarity_batch_api(
     query: str,
-    results: list[tuple],
+    results: list[dict],
     threshold: float = 0.7,
-    max_workers: int = 10
-) -> list[tuple]:
+    poll_interval: float = BATCH_API_POLL_INTERVAL_S
+) -> list[dict]:
+    """
+    Offline variant of filter_results_by_semantic_similarity using OpenAI's Batch API.
+    
+    For bulk, non-interactive scoring (re-scoring a library, eval sweeps):
+    Batch API requests cost half as much, but results can take up to 24h,
+    and this call blocks until the job finishes. Each batch line is one
+    batched scoring request of up to BATCH_SIZE captions. Captions the job
+    doesn't score are scored with realtime calls.
+    
+    Args:
+        query: User search query
+        results: Search row dicts (see filter_results_by_semantic_similarity)
+        threshold: Minimum similarity score to keep result (0.0 to 1.0)
+        poll_interval: Seconds between job status checks
+    
+    Returns:
+        Filtered list of results
+    """
+    captioned = [
+        (result, result['caption'].get('text', ''))
+        for result in results
+        if result['caption'] and result['caption'].get('text')
+    ]
+    captions = [caption_text for _, caption_text in captioned]
+    scores = [_cached_score(query, caption) for caption in captions]
+    uncached = [i for i, score in enumerate(scores) if score is None]
+    
+    if uncached:
+        client = get_openai_client()
+        chunks = [uncached[i:i + BATCH_SIZE] for i in range(0, len(uncached), BATCH_SIZE)]
+        lines = [
+            json.dumps({
+                "custom_id": str(n),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": _batch_request(query, [captions[i] for i in chunk])
+            })
+            for n, chunk in enumerate(chunks)
+        ]
+        
+        input_file = client.files.create(
+            file=("caption_scores.jsonl", "\n".join(lines).encode()),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("Submitted batch %s (%d captions in %d requests)", batch.id, len(uncached), len(chunks))
+        
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch.id)
+        
+        if batch.status == "completed" and batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                item = json.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                try:
+                    _apply_batch_scores(
+                        ChatCompletion.model_validate(response["body"]),
+                        query, captions, scores, chunks[int(item["custom_id"])]
+                    )
+                except Exception as e:
+                    logger.warning("Unparseable batch result %s: %s", item.get("custom_id"), e)
+        else:
+            logger.warning("Batch %s ended with status %s", batch.id, batch.status)
+    
+    scores = [
+        score if score is not None else calculate_text_similarity(query, caption)
+        for caption, score in zip(captions, scores)
+    ]
+    return [result for (result, _), score in zip(captioned, scores) if score >= threshold]
+
+
+async def score_captions_batch(
+    query: str,
+    captions: list[str],
+    semaphore: asyncio.Semaphore
+) -> list[float]:
+    """
+    Score many captions against one query with a single GPT request.
+    
+    The matching rules are sent once per batch instead of once per caption,
+    and only captions missing from the score cache are sent. Falls back to
+    per-caption requests (run concurrently) for any caption the model leaves
+    out, or for the whole batch if the request or parsing fails.
+    
+    Args:
+        query: Search query text
+        captions: Caption texts (at most BATCH_SIZE)
+        semaphore: Limits concurrent GPT requests
+    
+    Returns:
+        Similarity scores (0.0 to 1.0), aligned with captions
+    """
+    if not captions:
+        return []
+    
+    scores = [_cached_score(query, caption) for caption in captions]
+    uncached = [i for i, score in enumerate(scores) if score is None]
+    if not uncached:
+        return scores
+    
+    try:
+        client = get_async_openai_client()
+        request = _batch_request(query, [captions[i] for i in uncached])
+        async with semaphore:
+            await _throttle(request)
+            response = await client.chat.completions.create(**request)
+        _apply_batch_scores(response, query, captions, scores, uncached)
+    
+    except Exception as e:
+        logger.warning("Batched OpenAI scoring failed, falling back to per-caption calls: %s", e)
+    
+    missing = [i for i, score in enumerate(scores) if score is None]
+    fallback = await asyncio.gather(*[
+        calculate_text_similarity_async(query, captions[i], semaphore) for i in missing
+    ])
+    for i, score in zip(missing, fallback):
+        scores[i] = score
+    return scores
+
+
+async def filter_results_by_semantic_similarity(
+    query: str,
+    results: list[dict],
+    threshold: float = 0.7,
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS
+) -> list[dict]:
     """
     Filter search results by semantic similarity between query and captions.
-    Uses parallel execution for faster processing.
+    
+    Captions that share most of their words with the query pass without a
+    GPT call, long captions with no shared words and a low caption_score are
+    dropped without one, and captions whose embedding nearly matches one
+    already scored for the query reuse that score. The rest are scored in
+    batches of up to BATCH_SIZE per GPT request, all issued concurrently.
     
     Args:
         query: User search query (e.g., "dog on snow")
-        results: List of (segment_id, video_id, timestamp_ms, frame_url, score, caption_json)
+        results: Search row dicts (segment_id, video_id, t_start_ms, frame_url, score, caption, caption_emb)
         threshold: Minimum similarity score to keep result (0.0 to 1.0, default 0.7 = 70%)
-        max_workers: Maximum number of parallel threads (default 10)
+        max_concurrency: Maximum GPT requests in flight (default 20)
     
     Returns:
         Filtered list of results
@@ -179,61 +622,100 @@ def filter_results_by_semantic_similarity(
     if not results:
         return results
     
-    print(f"\n🤖 OpenAI GPT Semantic Filtering (PARALLEL) - Threshold: {threshold*100}%")
-    print(f"   Workers: {max_workers} | Results to process: {len(results)}")
-    print(f"{'='*60}")
-    
     start_time = time.time()
     
-    # Process all results in parallel
-    processed_results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_result = {
-            executor.submit(_process_single_result, query, result, i, threshold): i
-            for i, result in enumerate(results, 1)
-        }
-        
-        # Collect results as they complete
-        for future in as_completed(future_to_result):
-            try:
-                processed = future.result()
-                processed_results.append(processed)
-            except Exception as e:
-                idx = future_to_result[future]
-                print(f"  ❌ Error processing result #{idx}: {e}")
+    # Only captioned results can be scored; near-verbatim matches are
+    # accepted on word overlap alone, clear misses are rejected, and the
+    # rest go to GPT
+    captioned = []
+    accepted = []
+    rejected = []
+    skipped = []
+    for index, result in enumerate(results, 1):
+        caption_text = result['caption'].get('text', '') if result['caption'] else ''
+        if not caption_text:
+            skipped.append(index)
+        elif lexical_overlap(query, caption_text) >= LEXICAL_ACCEPT_JACCARD:
+            accepted.append(index)
+        elif _lexical_reject(query, caption_text, result.get('caption_score')):
+            rejected.append(index)
+        else:
+            captioned.append((index, result, caption_text))
+    
+    # Near-duplicates of captions already scored for this query (same
+    # content words, and close by stored caption embedding) reuse that score
+    caption_words = {index: _content_tokens(caption_text) for index, _, caption_text in captioned}
+    near_scores = lookup_scores(
+        query,
+        [result.get('caption_emb') for _, result, _ in captioned],
+        [caption_words[index] for index, _, _ in captioned]
+    )
+    scores = {
+        index: score
+        for (index, _, _), score in zip(captioned, near_scores)
+        if score is not None
+    }
+    to_score = [item for item in captioned if item[0] not in scores]
+    
+    batches = [
+        [caption_text for _, _, caption_text in to_score[i:i + BATCH_SIZE]]
+        for i in range(0, len(to_score), BATCH_SIZE)
+    ]
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    batch_scores = await asyncio.gather(*[
+        score_captions_batch(query, batch, semaphore) for batch in batches
+    ])
+    gpt_scores = [score for batch in batch_scores for score in batch]
+    for (index, _, _), score in zip(to_score, gpt_scores):
+        scores[index] = score
+    
+    # Only real GPT scores (those in the exact cache) seed the near-duplicate
+    # cache; failed calls score 0.0 and must not be reused
+    scored = [
+        (result.get('caption_emb'), caption_words[index], score)
+        for (index, result, caption_text), score in zip(to_score, gpt_scores)
+        if _score_key(query, caption_text) in _score_cache
+    ]
+    store_scores(
+        query,
+        [e for e, _, _ in scored],
+        [w for _, w, _ in scored],
+        [s for _, _, s in scored]
+    )
     
     elapsed_time = time.time() - start_time
     
-    # Sort by original index to maintain order
-    processed_results.sort(key=lambda x: x['index'])
-    
-    # Print results and filter
-    filtered_results = []
-    for processed in processed_results:
-        index = processed['index']
-        caption_text = processed['caption_text']
-        semantic_score = processed['semantic_score']
-        passed = processed['passed']
-        skipped = processed['skipped']
-        
-        if skipped:
-            print(f"  ⚠️  Result #{index}: No caption, skipping")
-            continue
-        
-        badge = "✅" if passed else "❌"
-        _, _, timestamp_ms, _, _, _ = processed['result']
-        timestamp = f"{timestamp_ms//60000}:{(timestamp_ms//1000)%60:02d}"
-        
-        print(f"  {badge} Result #{index}: semantic={semantic_score:.3f} ({semantic_score*100:.1f}%) at {timestamp}")
-        print(f"       Caption: \"{caption_text[:60]}...\"" if len(caption_text) > 60 else f"       Caption: \"{caption_text}\"")
-        
-        if passed:
-            filtered_results.append(processed['result'])
+    # Keep the original (visual score) order
+    accepted_set = set(accepted)
+    filtered_results = [
+        result
+        for index, result in enumerate(results, 1)
+        if index in accepted_set or scores.get(index, 0.0) >= threshold
+    ]
     
-    print(f"\n✅ Passed filter: {len(filtered_results)}/{len(results)}")
-    print(f"⚡ Processing time: {elapsed_time:.2f}s ({len(results)/elapsed_time:.1f} results/sec)")
-    print(f"{'='*60}\n")
+    # One log record per call, built only when DEBUG is on
+    if logger.isEnabledFor(logging.DEBUG):
+        lines = [
+            f"GPT semantic filter '{query}' (threshold {threshold:.2f}): "
+            f"{len(filtered_results)}/{len(results)} passed in {elapsed_time:.2f}s "
+            f"({len(to_score)} captions in {len(batches)} batch(es), "
+            f"{len(captioned) - len(to_score)} near-duplicate cache hits)"
+        ]
+        for index, result, caption_text in captioned:
+            semantic_score = scores[index]
+            badge = "pass" if semantic_score >= threshold else "fail"
+            ts = result['t_start_ms']
+            lines.append(
+                f"  #{index} {badge} semantic={semantic_score:.3f} at {ts // 60000}:{(ts // 1000) % 60:02d} "
+                f"caption=\"{caption_text[:60]}\""
+            )
+        if accepted:
+            lines.append(f"  accepted on word overlap: {accepted}")
+        if rejected:
+            lines.append(f"  rejected without GPT (no shared words): {rejected}")
+        if skipped:
+            lines.append(f"  no caption, skipped: {skipped}")
+        logger.debug("\n".join(lines))
     
     return filtered_results
-
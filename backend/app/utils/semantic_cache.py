@@ -0,0 +1,121 @@
+"""Near-duplicate caption score cache for the GPT semantic filter."""
+
+import numpy as np
+from cachetools import LRUCache
+from typing import Optional
+
+
+# Captions whose embeddings are at least this close (cosine) to an already
+# scored caption for the same query reuse its GPT score, but only if both
+# have the same content words: BLIP's templated captions ("a man/woman
+# standing in front of a building") can clear this cosine while differing
+# in exactly the word the query is about
+SIMILARITY_THRESHOLD = 0.95
+
+# Caption embeddings kept across all queries (least recently used queries
+# dropped first); 50k x 512 float32 is ~100 MB at the cap. One query keeps
+# at most MAX_CAPTIONS_PER_QUERY (oldest dropped first); typical queries
+# hold a few dozen captions.
+MAX_CACHED_VECTORS = 50_000
+MAX_CAPTIONS_PER_QUERY = 2_000
+
+# Normalized query -> {caption content words: (unit caption embeddings
+# [N, D], scores [N])}, sized by embedding count. Only touched from the
+# event loop, so no lock is needed.
+_entries = LRUCache(
+    maxsize=MAX_CACHED_VECTORS,
+    getsizeof=lambda groups: sum(len(scores) for _, scores in groups.values())
+)
+
+
+def _normalize(embedding) -> np.ndarray:
+    """Unit-normalize an embedding (stored caption embeddings may be any array-like)."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def lookup_scores(
+    query: str,
+    embeddings: list[Optional[np.ndarray]],
+    words: list[frozenset[str]]
+) -> list[Optional[float]]:
+    """
+    Find cached scores for captions close to ones already scored for query.
+
+    Args:
+        query: Search query text
+        embeddings: Caption embeddings (None where the caption has none)
+        words: Each caption's content words, aligned with embeddings
+
+    Returns:
+        Score of the nearest cached caption with the same content words
+        at or above SIMILARITY_THRESHOLD, or None, aligned with embeddings
+    """
+    groups = _entries.get(query.strip().lower())
+    scores: list[Optional[float]] = [None] * len(embeddings)
+    if groups is None:
+        return scores
+
+    for i, (embedding, caption_words) in enumerate(zip(embeddings, words)):
+        group = groups.get(caption_words)
+        if embedding is None or group is None:
+            continue
+
+        vectors, cached_scores = group
+        probe = _normalize(embedding)
+        if probe.shape[0] != vectors.shape[1]:
+            continue
+
+        similarities = vectors @ probe
+        nearest = similarities.argmax()
+        if similarities[nearest] >= SIMILARITY_THRESHOLD:
+            scores[i] = float(cached_scores[nearest])
+    return scores
+
+
+def store_scores(
+    query: str,
+    embeddings: list[Optional[np.ndarray]],
+    words: list[frozenset[str]],
+    scores: list[float]
+) -> None:
+    """
+    Remember GPT scores for captions that have embeddings.
+
+    Args:
+        query: Search query text
+        embeddings: Caption embeddings (None entries are skipped)
+        words: Each caption's content words, aligned with embeddings
+        scores: GPT scores aligned with embeddings
+    """
+    key = query.strip().lower()
+    groups = dict(_entries.get(key) or {})
+    stored = False
+
+    for embedding, caption_words, score in zip(embeddings, words, scores):
+        if embedding is None:
+            continue
+        vector = _normalize(embedding)[np.newaxis]
+        score_array = np.array([score], dtype=np.float32)
+
+        group = groups.pop(caption_words, None)
+        if group is not None and group[0].shape[1] == vector.shape[1]:
+            vector = np.concatenate([group[0], vector])
+            score_array = np.concatenate([group[1], score_array])
+        # Re-inserted last, so dict order runs from least to most recently stored
+        groups[caption_words] = (vector, score_array)
+        stored = True
+
+    if not stored:
+        return
+
+    total = sum(len(group_scores) for _, group_scores in groups.values())
+    while total > MAX_CAPTIONS_PER_QUERY and len(groups) > 1:
+        oldest = next(iter(groups))
+        total -= len(groups.pop(oldest)[1])
+    if total > MAX_CAPTIONS_PER_QUERY:
+        (caption_words, (vectors, group_scores)), = groups.items()
+        groups[caption_words] = (vectors[-MAX_CAPTIONS_PER_QUERY:], group_scores[-MAX_CAPTIONS_PER_QUERY:])
+
+    _entries[key] = groups
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""Run the OpenCLIP test scripts in one process so the model loads once."""
+
+import sys
+import time
+from worker.utils.embeddings import get_model
+import test_embeddings
+import test_query_variations
+
+
+def main():
+    # Load OpenCLIP up front; every script below reuses the same instance
+    start = time.perf_counter()
+    get_model()
+    print(f"⏱️  Model loaded in {time.perf_counter() - start:.1f}s\n")
+
+    if test_embeddings.main() != 0:
+        return 1
+
+    print()
+    test_query_variations.test_semantic_variations()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,7 @@
 """Test complete API."""
 
 import time
-import subprocess
+import httpx
 import psycopg
 from app.core.config import settings
 
@@ -41,56 +41,49 @@ def test_api():
     
     base_url = "http://localhost:8000"
     
-    # Test 1: Health check
-    print("📍 Test 1: Health Check")
-    print("-" * 60)
-    cmd = f"curl -s {base_url}/health"
-    print(f"$ {cmd}\n")
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    print(result.stdout)
-    print()
-    
-    # Test 2: List videos
-    print("\n📍 Test 2: List Videos")
-    print("-" * 60)
-    cmd = f"curl -s '{base_url}/v1/videos?user_id={user_id}&limit=5'"
-    print(f"$ {cmd}\n")
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    print(result.stdout[:500] + "..." if len(result.stdout) > 500 else result.stdout)
-    print()
-    
-    # Test 3: Get specific video
-    print("\n📍 Test 3: Get Video Details")
-    print("-" * 60)
-    cmd = f"curl -s '{base_url}/v1/videos/{video_id}?user_id={user_id}'"
-    print(f"$ {cmd}\n")
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    print(result.stdout)
-    print()
-    
-    # Test 4: Search - "sunset"
-    print("\n📍 Test 4: Search for 'sunset'")
-    print("-" * 60)
-    cmd = f'''curl -s -X POST {base_url}/v1/search \
-  -H "Content-Type: application/json" \
-  -d '{{"query": "sunset", "user_id": "{user_id}", "top_k": 5}}'
-'''
-    print(f"$ {cmd}")
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    print(result.stdout[:800] + "..." if len(result.stdout) > 800 else result.stdout)
-    print()
-    
-    # Test 5: Search within specific video
-    print("\n📍 Test 5: Search within specific video")
-    print("-" * 60)
-    cmd = f'''curl -s -X POST {base_url}/v1/search \
-  -H "Content-Type: application/json" \
-  -d '{{"query": "colorful", "user_id": "{user_id}", "video_id": "{video_id}", "top_k": 3}}'
-'''
-    print(f"$ {cmd}")
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    print(result.stdout[:800] + "..." if len(result.stdout) > 800 else result.stdout)
-    print()
+    # One client (and keep-alive connection) for every request
+    with httpx.Client(base_url=base_url, timeout=30.0) as client:
+        # Test 1: Health check
+        print("📍 Test 1: Health Check")
+        print("-" * 60)
+        print("GET /health\n")
+        result = client.get("/health")
+        print(result.text)
+        print()
+        
+        # Test 2: List videos
+        print("\n📍 Test 2: List Videos")
+        print("-" * 60)
+        print(f"GET /v1/videos?user_id={user_id}&limit=5\n")
+        result = client.get("/v1/videos", params={"user_id": user_id, "limit": 5})
+        print(result.text[:500] + "..." if len(result.text) > 500 else result.text)
+        print()
+        
+        # Test 3: Get specific video
+        print("\n📍 Test 3: Get Video Details")
+        print("-" * 60)
+        print(f"GET /v1/videos/{video_id}?user_id={user_id}\n")
+        result = client.get(f"/v1/videos/{video_id}", params={"user_id": user_id})
+        print(result.text)
+        print()
+        
+        # Test 4: Search - "sunset"
+        print("\n📍 Test 4: Search for 'sunset'")
+        print("-" * 60)
+        body = {"query": "sunset", "user_id": user_id, "top_k": 5}
+        print(f"POST /v1/search {body}\n")
+        result = client.post("/v1/search", json=body)
+        print(result.text[:800] + "..." if len(result.text) > 800 else result.text)
+        print()
+        
+        # Test 5: Search within specific video
+        print("\n📍 Test 5: Search within specific video")
+        print("-" * 60)
+        body = {"query": "colorful", "user_id": user_id, "video_id": video_id, "top_k": 3}
+        print(f"POST /v1/search {body}\n")
+        result = client.post("/v1/search", json=body)
+        print(result.text[:800] + "..." if len(result.text) > 800 else result.text)
+        print()
     
     print("\n" + "=" * 60)
     print("✅ API Test Complete!")
@@ -4,146 +4,131 @@
 import sys
 import psycopg
 from app.core.config import settings
-
-
-def test_postgres_connection():
+from app.db import get_pool
+
+
+# Every schema check reads from this one query (one round trip), keyed by k:
+# ver, ext (name, version), col (table, column, type), idx (table, name,
+# definition), rls (table, enabled)
+SQL_SCHEMA_INFO = """
+    SELECT 'ver' AS k, version() AS a, NULL AS b, NULL AS c, 0 AS n
+    UNION ALL
+    SELECT 'ext', extname::text, extversion, NULL, 0
+    FROM pg_extension
+    WHERE extname IN ('vector', 'pgcrypto')
+    UNION ALL
+    SELECT 'col', table_name::text, column_name::text, data_type::text, ordinal_position::int
+    FROM information_schema.columns
+    WHERE table_schema = 'public'
+      AND table_name IN ('videos', 'segments')
+    UNION ALL
+    SELECT 'idx', tablename::text, indexname::text, indexdef, 0
+    FROM pg_indexes
+    WHERE schemaname = 'public'
+      AND tablename = 'segments'
+    UNION ALL
+    SELECT 'rls', tablename::text, rowsecurity::text, NULL, 0
+    FROM pg_tables
+    WHERE schemaname = 'public'
+      AND tablename IN ('videos', 'segments')
+    ORDER BY k, a, n;
+"""
+
+
+def fetch_schema_info(conn: psycopg.Connection) -> dict[str, list[tuple]]:
+    """
+    Run SQL_SCHEMA_INFO and group its rows by kind.
+    
+    Returns:
+        Dict of kind -> list of (a, b, c) tuples
+    """
+    info = {"ver": [], "ext": [], "col": [], "idx": [], "rls": []}
+    with conn.cursor() as cur:
+        cur.execute(SQL_SCHEMA_INFO)
+        for k, a, b, c, _ in cur.fetchall():
+            info[k].append((a, b, c))
+    return info
+
+
+def test_postgres_connection(info: dict):
     """Test direct Postgres connection."""
     print("🔌 Testing Postgres connection...")
-    try:
-        with psycopg.connect(settings.DATABASE_URL) as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT version();")
-                version = cur.fetchone()[0]
-                print(f"✅ Connected to Postgres: {version[:50]}...")
-                return True
-    except Exception as e:
-        print(f"❌ Postgres connection failed: {e}")
+    version = info["ver"][0][0]
+    print(f"✅ Connected to Postgres: {version[:50]}...")
+    return True
+
+
+def test_pool_config():
+    """Check the API connection pool is sized from settings."""
+    print("\n🏊 Checking connection pool config...")
+    pool = get_pool()
+    if pool.min_size != settings.DB_MIN_CONNS or pool.max_size != settings.DB_MAX_CONNS:
+        print(
+            f"❌ Pool size min={pool.min_size}, max={pool.max_size} "
+            f"(expected min={settings.DB_MIN_CONNS}, max={settings.DB_MAX_CONNS})"
+        )
         return False
+    print(f"✅ Pool size min={pool.min_size}, max={pool.max_size}")
+    return True
 
 
-def test_extensions():
+def test_extensions(info: dict):
     """Check pgvector extension."""
     print("\n🔌 Checking extensions...")
-    try:
-        with psycopg.connect(settings.DATABASE_URL) as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT extname, extversion 
-                    FROM pg_extension 
-                    WHERE extname IN ('vector', 'pgcrypto');
-                """)
-                exts = cur.fetchall()
-                for name, version in exts:
-                    print(f"✅ Extension {name} v{version} enabled")
-                
-                if len(exts) < 2:
-                    print("⚠️  Missing extensions. Expected: vector, pgcrypto")
-                    return False
-                return True
-    except Exception as e:
-        print(f"❌ Extension check failed: {e}")
+    exts = info["ext"]
+    for name, version, _ in exts:
+        print(f"✅ Extension {name} v{version} enabled")
+    
+    if len(exts) < 2:
+        print("⚠️  Missing extensions. Expected: vector, pgcrypto")
         return False
+    return True
 
 
-def test_tables():
+def test_tables(info: dict):
     """Verify videos and segments tables exist."""
     print("\n📊 Checking tables...")
-    try:
-        with psycopg.connect(settings.DATABASE_URL) as conn:
-            with conn.cursor() as cur:
-                # Check videos table
-                cur.execute("""
-                    SELECT column_name, data_type 
-                    FROM information_schema.columns 
-                    WHERE table_schema = 'public' 
-                      AND table_name = 'videos'
-                    ORDER BY ordinal_position;
-                """)
-                video_cols = cur.fetchall()
-                
-                if video_cols:
-                    print(f"✅ Table 'videos' exists with {len(video_cols)} columns")
-                    for col, dtype in video_cols:
-                        print(f"   - {col}: {dtype}")
-                else:
-                    print("❌ Table 'videos' not found")
-                    return False
-                
-                # Check segments table
-                cur.execute("""
-                    SELECT column_name, data_type 
-                    FROM information_schema.columns 
-                    WHERE table_schema = 'public' 
-                      AND table_name = 'segments'
-                    ORDER BY ordinal_position;
-                """)
-                segment_cols = cur.fetchall()
-                
-                if segment_cols:
-                    print(f"\n✅ Table 'segments' exists with {len(segment_cols)} columns")
-                    for col, dtype in segment_cols:
-                        print(f"   - {col}: {dtype}")
-                else:
-                    print("❌ Table 'segments' not found")
-                    return False
-                
-                return True
-    except Exception as e:
-        print(f"❌ Table check failed: {e}")
-        return False
+    for i, table in enumerate(["videos", "segments"]):
+        cols = [(col, dtype) for name, col, dtype in info["col"] if name == table]
+        
+        if cols:
+            if i:
+                print()
+            print(f"✅ Table '{table}' exists with {len(cols)} columns")
+            for col, dtype in cols:
+                print(f"   - {col}: {dtype}")
+        else:
+            print(f"❌ Table '{table}' not found")
+            return False
+    
+    return True
 
 
-def test_indexes():
+def test_indexes(info: dict):
     """Check vector index on segments."""
     print("\n🔍 Checking indexes...")
-    try:
-        with psycopg.connect(settings.DATABASE_URL) as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT indexname, indexdef 
-                    FROM pg_indexes 
-                    WHERE tablename = 'segments' 
-                      AND schemaname = 'public';
-                """)
-                indexes = cur.fetchall()
-                
-                if indexes:
-                    print(f"✅ Found {len(indexes)} index(es) on 'segments':")
-                    for name, defn in indexes:
-                        print(f"   - {name}")
-                        if "ivfflat" in defn.lower():
-                            print(f"     🎯 Vector index detected!")
-                else:
-                    print("⚠️  No indexes found on 'segments'")
-                
-                return True
-    except Exception as e:
-        print(f"❌ Index check failed: {e}")
-        return False
+    indexes = info["idx"]
+    
+    if indexes:
+        print(f"✅ Found {len(indexes)} index(es) on 'segments':")
+        for _, name, defn in indexes:
+            print(f"   - {name}")
+            if "ivfflat" in defn.lower():
+                print(f"     🎯 Vector index detected!")
+    else:
+        print("⚠️  No indexes found on 'segments'")
+    
+    return True
 
 
-def test_rls():
+def test_rls(info: dict):
     """Check if RLS is enabled."""
     print("\n🔒 Checking Row Level Security...")
-    try:
-        with psycopg.connect(settings.DATABASE_URL) as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT tablename, rowsecurity 
-                    FROM pg_tables 
-                    WHERE schemaname = 'public' 
-                      AND tablename IN ('videos', 'segments');
-                """)
-                rls_status = cur.fetchall()
-                
-                for table, enabled in rls_status:
-                    status = "✅ Enabled" if enabled else "⚠️  Disabled"
-                    print(f"{status} on '{table}'")
-                
-                return True
-    except Exception as e:
-        print(f"❌ RLS check failed: {e}")
-        return False
+    for table, enabled, _ in info["rls"]:
+        status = "✅ Enabled" if enabled == "true" else "⚠️  Disabled"
+        print(f"{status} on '{table}'")
+    
+    return True
 
 
 def main():
@@ -151,12 +136,21 @@ def main():
     print("🚀 Supabase Connection Test")
     print("=" * 60)
     
+    # One connection and one query for every schema check
+    try:
+        with psycopg.connect(settings.DATABASE_URL) as conn:
+            info = fetch_schema_info(conn)
+    except Exception as e:
+        print(f"❌ Postgres connection failed: {e}")
+        return 1
+    
     results = []
-    results.append(test_postgres_connection())
-    results.append(test_extensions())
-    results.append(test_tables())
-    results.append(test_indexes())
-    results.append(test_rls())
+    results.append(test_postgres_connection(info))
+    results.append(test_pool_config())
+    results.append(test_extensions(info))
+    results.append(test_tables(info))
+    results.append(test_indexes(info))
+    results.append(test_rls(info))
     
     print("\n" + "=" * 60)
     if all(results):
@@ -3,7 +3,7 @@
 
 import numpy as np
 from PIL import Image
-from worker.utils.embeddings import get_model, encode_text, encode_image
+from worker.utils.embeddings import get_model, encode_texts_batch, encode_images_batch
 
 
 def test_model_loading():
@@ -29,17 +29,18 @@ def test_text_encoding():
     
     queries = ["sunset", "golden hour", "mountain landscape", "ocean waves"]
     
-    for query in queries:
-        emb = encode_text(query)
-        norm = np.linalg.norm(emb)
-        
+    # One forward pass for all queries
+    embeddings = encode_texts_batch(queries)
+    norms = np.linalg.norm(embeddings, axis=1)
+    
+    for query, emb, norm in zip(queries, embeddings, norms):
         print(f"\n'{query}':")
         print(f"  Shape: {emb.shape}")
         print(f"  L2 norm: {norm:.6f} (should be ~1.0)")
         print(f"  Sample values: [{emb[0]:.4f}, {emb[1]:.4f}, {emb[2]:.4f}, ...]")
-        
-        assert emb.shape[0] in [512, 768], f"Unexpected dimension: {emb.shape}"
-        assert 0.99 < norm < 1.01, f"Not unit-normalized: {norm}"
+    
+    assert embeddings.shape[1] in [512, 768], f"Unexpected dimension: {embeddings.shape}"
+    assert np.allclose(norms, 1.0, atol=1e-2), f"Not unit-normalized: {norms}"
     
     print("\n✅ All text encodings successful")
 
@@ -57,17 +58,18 @@ def test_image_encoding():
         ("Blue image", Image.new("RGB", (224, 224), color=(0, 0, 255))),
     ]
     
-    for name, img in test_images:
-        emb = encode_image(img)
-        norm = np.linalg.norm(emb)
-        
+    # One forward pass for all images
+    embeddings = encode_images_batch([img for _, img in test_images])
+    norms = np.linalg.norm(embeddings, axis=1)
+    
+    for (name, _), emb, norm in zip(test_images, embeddings, norms):
         print(f"\n{name}:")
         print(f"  Shape: {emb.shape}")
         print(f"  L2 norm: {norm:.6f} (should be ~1.0)")
         print(f"  Sample values: [{emb[0]:.4f}, {emb[1]:.4f}, {emb[2]:.4f}, ...]")
-        
-        assert emb.shape[0] in [512, 768], f"Unexpected dimension: {emb.shape}"
-        assert 0.99 < norm < 1.01, f"Not unit-normalized: {norm}"
+    
+    assert embeddings.shape[1] in [512, 768], f"Unexpected dimension: {embeddings.shape}"
+    assert np.allclose(norms, 1.0, atol=1e-2), f"Not unit-normalized: {norms}"
     
     print("\n✅ All image encodings successful")
 
@@ -79,13 +81,12 @@ def test_similarity():
     print("=" * 60)
     
     # Encode related and unrelated queries
-    sunset_emb = encode_text("sunset")
-    golden_hour_emb = encode_text("golden hour")
-    mountain_emb = encode_text("mountain")
+    embeddings = encode_texts_batch(["sunset", "golden hour", "mountain"])
     
-    # Cosine similarity (dot product of normalized vectors)
-    sim_sunset_golden = np.dot(sunset_emb, golden_hour_emb)
-    sim_sunset_mountain = np.dot(sunset_emb, mountain_emb)
+    # Cosine similarity (dot product of normalized vectors), all pairs at once
+    sims = embeddings @ embeddings.T
+    sim_sunset_golden = sims[0, 1]
+    sim_sunset_mountain = sims[0, 2]
     
     print(f"\nSimilarity scores (0=unrelated, 1=identical):")
     print(f"  'sunset' ↔ 'golden hour': {sim_sunset_golden:.4f}")
@@ -118,10 +119,10 @@ def test_batch_encoding():
     print(f"\nBatch shape: {embeddings.shape}")
     print(f"Expected: (3, {model.emb_dim})")
     
-    for i, emb in enumerate(embeddings):
-        norm = np.linalg.norm(emb)
+    norms = np.linalg.norm(embeddings, axis=1)
+    for i, norm in enumerate(norms):
         print(f"  Image {i+1} norm: {norm:.6f}")
-        assert 0.99 < norm < 1.01, f"Not unit-normalized: {norm}"
+    assert np.allclose(norms, 1.0, atol=1e-2), f"Not unit-normalized: {norms}"
     
     print("\n✅ Batch encoding successful")
 
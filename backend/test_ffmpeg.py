@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 """Test FFmpeg utilities with a synthetic test video."""
 
+import io
 import os
+import sys
+import atexit
+import shutil
+import contextlib
 import subprocess
 import tempfile
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 from worker.utils.ffmpeg import probe_video, extract_frames, extract_single_frame, create_thumbnail
 
 
@@ -26,6 +36,9 @@ def create_test_video(output_path: str, duration_sec: int = 5) -> None:
         '-vf', 'drawtext=fontfile=/System/Library/Fonts/Helvetica.ttc:text=%{pts\\:hms}:fontsize=48:fontcolor=white:x=(w-text_w)/2:y=(h-text_h)/2',
         '-pix_fmt', 'yuv420p',
         '-c:v', 'libx264',
+        '-preset', 'ultrafast',  # Quality is irrelevant for test clips
+        '-tune', 'zerolatency',
+        '-threads', '0',
         '-y',  # Overwrite output
         output_path
     ]
@@ -47,6 +60,9 @@ def create_test_video(output_path: str, duration_sec: int = 5) -> None:
             '-i', f'testsrc=duration={duration_sec}:size=640x480:rate=30',
             '-pix_fmt', 'yuv420p',
             '-c:v', 'libx264',
+            '-preset', 'ultrafast',  # Quality is irrelevant for test clips
+            '-tune', 'zerolatency',
+            '-threads', '0',
             '-y',
             output_path
         ]
@@ -54,28 +70,65 @@ def create_test_video(output_path: str, duration_sec: int = 5) -> None:
         print(f"✅ Test video created: {output_path}")
 
 
+# Shared directory for generated clips (removed at exit)
+_video_dir: Optional[str] = None
+
+
+@lru_cache(maxsize=4)
+def get_test_video(duration_sec: int) -> str:
+    """
+    Return a test video of the given duration, encoding it only once.
+    
+    Tests only read the clip, so they all share the same file.
+    
+    Args:
+        duration_sec: Video duration in seconds
+    
+    Returns:
+        Path to the cached test video
+    """
+    global _video_dir
+    
+    if _video_dir is None:
+        _video_dir = tempfile.mkdtemp(prefix="test_ffmpeg_")
+        atexit.register(shutil.rmtree, _video_dir, ignore_errors=True)
+    
+    video_path = os.path.join(_video_dir, f"test_{duration_sec}s.mp4")
+    create_test_video(video_path, duration_sec=duration_sec)
+    return video_path
+
+
+@lru_cache(maxsize=1)
+def get_test_frames() -> list:
+    """
+    Return the 3s test video's frames at 1 fps, decoding them only once.
+    
+    Returns:
+        List of (timestamp_ms, PIL Image) tuples
+    """
+    return list(extract_frames(get_test_video(duration_sec=3), fps=1.0))
+
+
 def test_probe():
     """Test video probing."""
     print("\n" + "=" * 60)
     print("Test 1: Probe Video Metadata")
     print("=" * 60)
     
-    with tempfile.TemporaryDirectory() as tmpdir:
-        video_path = os.path.join(tmpdir, "test.mp4")
-        create_test_video(video_path, duration_sec=3)
-        
-        metadata = probe_video(video_path)
-        
-        print(f"\n📊 Video Metadata:")
-        print(f"  Duration: {metadata['duration_ms']}ms ({metadata['duration_ms']/1000:.1f}s)")
-        print(f"  Resolution: {metadata['width']}x{metadata['height']}")
-        print(f"  FPS: {metadata['fps']:.2f}")
-        
-        assert metadata['duration_ms'] > 0, "Duration should be > 0"
-        assert metadata['width'] == 640, f"Width should be 640, got {metadata['width']}"
-        assert metadata['height'] == 480, f"Height should be 480, got {metadata['height']}"
-        
-        print("\n✅ Probe test passed")
+    video_path = get_test_video(duration_sec=3)
+    
+    metadata = probe_video(video_path)
+    
+    print(f"\n📊 Video Metadata:")
+    print(f"  Duration: {metadata['duration_ms']}ms ({metadata['duration_ms']/1000:.1f}s)")
+    print(f"  Resolution: {metadata['width']}x{metadata['height']}")
+    print(f"  FPS: {metadata['fps']:.2f}")
+    
+    assert metadata['duration_ms'] > 0, "Duration should be > 0"
+    assert metadata['width'] == 640, f"Width should be 640, got {metadata['width']}"
+    assert metadata['height'] == 480, f"Height should be 480, got {metadata['height']}"
+    
+    print("\n✅ Probe test passed")
 
 
 def test_extract_frames():
@@ -84,30 +137,26 @@ def test_extract_frames():
     print("Test 2: Extract Frames (1 fps)")
     print("=" * 60)
     
-    with tempfile.TemporaryDirectory() as tmpdir:
-        video_path = os.path.join(tmpdir, "test.mp4")
-        create_test_video(video_path, duration_sec=3)
-        
-        frames = list(extract_frames(video_path, fps=1.0))
-        
-        print(f"\n📸 Extracted {len(frames)} frames:")
-        for timestamp_ms, frame in frames:
-            print(f"  Frame at {timestamp_ms}ms - size: {frame.size}, mode: {frame.mode}")
-        
-        # Should get ~3 frames (1 fps * 3 seconds)
-        assert 2 <= len(frames) <= 4, f"Expected ~3 frames, got {len(frames)}"
-        
-        # Check first frame
-        timestamp_ms, frame = frames[0]
-        assert timestamp_ms >= 0, f"First timestamp should be >= 0ms, got {timestamp_ms}ms"
-        assert frame.mode == 'RGB', f"Frame should be RGB, got {frame.mode}"
-        assert frame.size == (640, 480), f"Frame size should be (640, 480), got {frame.size}"
-        
-        # Check timestamps are increasing
-        timestamps = [ts for ts, _ in frames]
-        assert timestamps == sorted(timestamps), "Timestamps should be monotonically increasing"
-        
-        print("\n✅ Frame extraction test passed")
+    frames = get_test_frames()
+    
+    print(f"\n📸 Extracted {len(frames)} frames:")
+    for timestamp_ms, frame in frames:
+        print(f"  Frame at {timestamp_ms}ms - size: {frame.size}, mode: {frame.mode}")
+    
+    # Should get ~3 frames (1 fps * 3 seconds)
+    assert 2 <= len(frames) <= 4, f"Expected ~3 frames, got {len(frames)}"
+    
+    # Check first frame
+    timestamp_ms, frame = frames[0]
+    assert timestamp_ms >= 0, f"First timestamp should be >= 0ms, got {timestamp_ms}ms"
+    assert frame.mode == 'RGB', f"Frame should be RGB, got {frame.mode}"
+    assert frame.size == (640, 480), f"Frame size should be (640, 480), got {frame.size}"
+    
+    # Check timestamps are increasing
+    timestamps = [ts for ts, _ in frames]
+    assert timestamps == sorted(timestamps), "Timestamps should be monotonically increasing"
+    
+    print("\n✅ Frame extraction test passed")
 
 
 def test_extract_single_frame():
@@ -116,21 +165,19 @@ def test_extract_single_frame():
     print("Test 3: Extract Single Frame")
     print("=" * 60)
     
-    with tempfile.TemporaryDirectory() as tmpdir:
-        video_path = os.path.join(tmpdir, "test.mp4")
-        create_test_video(video_path, duration_sec=5)
-        
-        # Extract frame at 2.5 seconds
-        frame = extract_single_frame(video_path, timestamp_sec=2.5)
-        
-        print(f"\n📸 Single frame at 2.5s:")
-        print(f"  Size: {frame.size}")
-        print(f"  Mode: {frame.mode}")
-        
-        assert frame.size == (640, 480), f"Expected (640, 480), got {frame.size}"
-        assert frame.mode == 'RGB', f"Expected RGB, got {frame.mode}"
-        
-        print("\n✅ Single frame extraction test passed")
+    video_path = get_test_video(duration_sec=3)
+    
+    # Extract frame at 2.5 seconds
+    frame = extract_single_frame(video_path, timestamp_sec=2.5)
+    
+    print(f"\n📸 Single frame at 2.5s:")
+    print(f"  Size: {frame.size}")
+    print(f"  Mode: {frame.mode}")
+    
+    assert frame.size == (640, 480), f"Expected (640, 480), got {frame.size}"
+    assert frame.mode == 'RGB', f"Expected RGB, got {frame.mode}"
+    
+    print("\n✅ Single frame extraction test passed")
 
 
 def test_thumbnail():
@@ -139,31 +186,57 @@ def test_thumbnail():
     print("Test 4: Thumbnail Creation")
     print("=" * 60)
     
-    with tempfile.TemporaryDirectory() as tmpdir:
-        video_path = os.path.join(tmpdir, "test.mp4")
-        create_test_video(video_path, duration_sec=2)
-        
-        # Extract a frame and create thumbnail
-        frame = extract_single_frame(video_path, timestamp_sec=1.0)
-        original_size = frame.size
-        
-        # Create thumbnail (max 320px)
-        thumb = create_thumbnail(frame.copy(), max_size=320)
-        
-        print(f"\n🖼️  Thumbnail:")
-        print(f"  Original size: {original_size}")
-        print(f"  Thumbnail size: {thumb.size}")
-        print(f"  Aspect ratio preserved: {abs(original_size[0]/original_size[1] - thumb.size[0]/thumb.size[1]) < 0.01}")
-        
-        # Check that thumbnail is smaller
-        assert max(thumb.size) <= 320, f"Thumbnail should be max 320px, got {max(thumb.size)}"
-        
-        # Check aspect ratio preserved (roughly)
-        original_ratio = original_size[0] / original_size[1]
-        thumb_ratio = thumb.size[0] / thumb.size[1]
-        assert abs(original_ratio - thumb_ratio) < 0.1, "Aspect ratio not preserved"
-        
-        print("\n✅ Thumbnail test passed")
+    # Reuse the frame at ~1s from test_extract_frames instead of decoding again
+    frames = get_test_frames()
+    _, frame = frames[min(1, len(frames) - 1)]
+    original_size = frame.size
+    
+    # Create thumbnail (max 320px). This resizes frame in place, which is
+    # fine since no later test reads it.
+    thumb = create_thumbnail(frame, max_size=320)
+    
+    print(f"\n🖼️  Thumbnail:")
+    print(f"  Original size: {original_size}")
+    print(f"  Thumbnail size: {thumb.size}")
+    print(f"  Aspect ratio preserved: {abs(original_size[0]/original_size[1] - thumb.size[0]/thumb.size[1]) < 0.01}")
+    
+    # Check that thumbnail is smaller
+    assert max(thumb.size) <= 320, f"Thumbnail should be max 320px, got {max(thumb.size)}"
+    
+    # Check aspect ratio preserved (roughly)
+    original_ratio = original_size[0] / original_size[1]
+    thumb_ratio = thumb.size[0] / thumb.size[1]
+    assert abs(original_ratio - thumb_ratio) < 0.1, "Aspect ratio not preserved"
+    
+    print("\n✅ Thumbnail test passed")
+
+
+# Independent test groups, run concurrently. test_thumbnail shares
+# test_extract_frames' decoded frames, so they run in the same worker.
+TEST_GROUPS = [
+    (test_probe,),
+    (test_extract_frames, test_thumbnail),
+    (test_extract_single_frame,),
+]
+
+
+def run_test_group(tests: tuple) -> tuple[str, bool]:
+    """
+    Run tests in order inside a worker process, capturing their output.
+    
+    Returns:
+        (printed output, whether all tests passed)
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            for test in tests:
+                test()
+        except Exception as e:
+            print(f"\n❌ Test failed: {e}")
+            traceback.print_exc(file=sys.stdout)
+            return output.getvalue(), False
+    return output.getvalue(), True
 
 
 def main():
@@ -172,26 +245,30 @@ def main():
     print("🚀 FFmpeg Utilities Test")
     print("=" * 60)
     
+    # Encode the clip once up front; forked workers inherit the cached path
     try:
-        test_probe()
-        test_extract_frames()
-        test_extract_single_frame()
-        test_thumbnail()
-        
-        print("\n" + "=" * 60)
-        print("🎉 All FFmpeg tests passed!")
-        print("=" * 60)
-        
+        get_test_video(duration_sec=3)
     except Exception as e:
-        print(f"\n❌ Test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"\n❌ Could not create test video: {e}")
         return 1
     
+    # Each group's ffmpeg work runs in parallel; output is printed in order
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=len(TEST_GROUPS), mp_context=ctx) as executor:
+        results = list(executor.map(run_test_group, TEST_GROUPS))
+    
+    for output, _ in results:
+        print(output, end="")
+    
+    if not all(passed for _, passed in results):
+        return 1
+    
+    print("\n" + "=" * 60)
+    print("🎉 All FFmpeg tests passed!")
+    print("=" * 60)
     return 0
 
 
 if __name__ == "__main__":
-    import sys
     sys.exit(main())
 
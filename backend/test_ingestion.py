@@ -1,31 +1,70 @@
 #!/usr/bin/env python3
-"""Test video ingestion pipeline with a real video."""
+"""Test the ingestion pipeline (embed, caption, store) with synthetic frames."""
 
 import os
 import sys
 import uuid
 import tempfile
-import subprocess
-from worker.ingest_video import ingest_video
+from typing import Optional
+import numpy as np
+import psycopg
+from PIL import Image
+from app.core.config import settings
+from worker.ingest_video import ingest_video_from_frames
 from worker.utils.supabase_io import get_video, count_segments
 
 
-def create_test_video(output_path: str, duration_sec: int = 5) -> None:
-    """Create a test video using FFmpeg."""
-    print(f"📹 Creating {duration_sec}s test video...")
+def create_test_frames(num_frames: int = 5) -> list[tuple[int, Image.Image]]:
+    """
+    Create random 640x480 frames, one per second.
     
-    cmd = [
-        'ffmpeg',
-        '-f', 'lavfi',
-        '-i', f'testsrc=duration={duration_sec}:size=640x480:rate=30',
-        '-pix_fmt', 'yuv420p',
-        '-c:v', 'libx264',
-        '-y',
-        output_path
-    ]
+    Frames go straight to ingestion; encoding a video only for ingestion to
+    decode it again is wasted work (test_ffmpeg.py covers decoding).
     
-    subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    print(f"✅ Test video created: {output_path}\n")
+    Returns:
+        List of (timestamp_ms, PIL Image) tuples
+    """
+    print(f"🎨 Creating {num_frames} synthetic frames...")
+    pixels = np.random.default_rng(0).integers(0, 255, (num_frames, 480, 640, 3), dtype=np.uint8)
+    frames = [(i * 1000, Image.fromarray(frame)) for i, frame in enumerate(pixels)]
+    print(f"✅ Test frames created\n")
+    return frames
+
+
+# The test user's id, cached across runs to skip a DB round trip
+USER_ID_CACHE = os.path.join(tempfile.gettempdir(), "vss_test_user_id")
+
+
+def _load_cached_user_id(refresh: bool = False) -> Optional[str]:
+    """
+    Return the test user's id, querying the DB only if it isn't cached.
+    
+    Args:
+        refresh: Ignore the cached id and look it up again
+    
+    Returns:
+        User id, or None if there are no users
+    """
+    if not refresh:
+        try:
+            with open(USER_ID_CACHE) as f:
+                user_id = f.read().strip()
+            if user_id:
+                return user_id
+        except OSError:
+            pass
+    
+    with psycopg.connect(settings.DATABASE_URL) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM auth.users LIMIT 1")
+            row = cur.fetchone()
+    if not row:
+        return None
+    
+    user_id = str(row[0])
+    with open(USER_ID_CACHE, "w") as f:
+        f.write(user_id)
+    return user_id
 
 
 def test_ingestion():
@@ -36,85 +75,85 @@ def test_ingestion():
     print()
     
     # Get test user (from previous test)
-    import psycopg
-    from app.core.config import settings
-    
-    with psycopg.connect(settings.DATABASE_URL) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT id FROM auth.users LIMIT 1")
-            row = cur.fetchone()
-            if not row:
-                print("❌ No users found. Run test_supabase_io.py first to create test user.")
-                return 1
-            test_user_id = str(row[0])
+    test_user_id = _load_cached_user_id()
+    if not test_user_id:
+        print("❌ No users found. Run test_supabase_io.py first to create test user.")
+        return 1
     
     print(f"👤 Using test user: {test_user_id}\n")
     
-    # Create test video
-    with tempfile.TemporaryDirectory() as tmpdir:
-        video_path = os.path.join(tmpdir, "test_video.mp4")
-        create_test_video(video_path, duration_sec=5)
-        
-        # Generate video ID
-        video_id = str(uuid.uuid4())
-        
-        # Run ingestion
+    # Create test frames
+    frames = create_test_frames(num_frames=5)
+    
+    # Generate video ID
+    video_id = str(uuid.uuid4())
+    
+    ingest_kwargs = dict(
+        frames=frames,
+        video_id=video_id,
+        batch_size=3  # Small batch for testing
+    )
+    
+    # Run ingestion
+    try:
         try:
-            result = ingest_video(
-                video_path=video_path,
-                video_id=video_id,
-                user_id=test_user_id,
-                fps=1.0,
-                batch_size=3,  # Small batch for testing
-                upload_video=False
-            )
-            
-            print("\n" + "=" * 60)
-            print("✅ Ingestion Test Passed!")
-            print("=" * 60)
-            
-            # Verify results
-            print("\n🔍 Verification:")
-            
-            # Check video record
-            video = get_video(video_id)
-            if video:
-                print(f"   ✅ Video record exists")
-                print(f"      Status: {video['status']}")
-                print(f"      Duration: {video['duration_ms']}ms")
-            else:
-                print(f"   ❌ Video record not found!")
+            result = ingest_video_from_frames(user_id=test_user_id, **ingest_kwargs)
+        except psycopg.errors.ForeignKeyViolation:
+            # Cached user no longer exists; look it up again and retry once
+            print("⚠️  Cached test user is gone, looking it up again...")
+            test_user_id = _load_cached_user_id(refresh=True)
+            if not test_user_id:
+                print("❌ No users found. Run test_supabase_io.py first to create test user.")
                 return 1
-            
-            # Check segments
-            segment_count = count_segments(video_id)
-            print(f"   ✅ Segments inserted: {segment_count}")
-            
-            # Verify count matches
-            expected_segments = result['segments_inserted']
-            if segment_count == expected_segments:
-                print(f"   ✅ Segment count matches: {segment_count}")
-            else:
-                print(f"   ⚠️  Segment count mismatch: expected {expected_segments}, got {segment_count}")
-            
-            print("\n📋 Final Summary:")
-            print(f"   Video ID: {result['video_id']}")
-            print(f"   User ID: {result['user_id']}")
-            print(f"   Duration: {result['duration_ms']}ms ({result['duration_ms']/1000:.1f}s)")
-            print(f"   Frames extracted: {result['frames_extracted']}")
-            print(f"   Segments in DB: {segment_count}")
-            print(f"   Status: {result['status']}")
-            
-            print("\n💡 Test data remains in database for verification")
-            print(f"   You can query this video in search tests using video_id: {video_id}")
-            
-            return 0
-            
-        except Exception as e:
-            print(f"\n❌ Test failed: {e}")
-            import traceback
-            traceback.print_exc()
+            print(f"👤 Using test user: {test_user_id}\n")
+            result = ingest_video_from_frames(user_id=test_user_id, **ingest_kwargs)
+        
+        print("\n" + "=" * 60)
+        print("✅ Ingestion Test Passed!")
+        print("=" * 60)
+        
+        # Verify results
+        print("\n🔍 Verification:")
+        
+        # Check video record
+        video = get_video(video_id)
+        if video:
+            print(f"   ✅ Video record exists")
+            print(f"      Status: {video['status']}")
+            print(f"      Duration: {video['duration_ms']}ms")
+        else:
+            print(f"   ❌ Video record not found!")
             return 1
+        
+        # Check segments
+        segment_count = count_segments(video_id)
+        print(f"   ✅ Segments inserted: {segment_count}")
+        
+        # Verify count matches
+        expected_segments = result['segments_inserted']
+        if segment_count == expected_segments:
+            print(f"   ✅ Segment count matches: {segment_count}")
+        else:
+            print(f"   ⚠️  Segment count mismatch: expected {expected_segments}, got {segment_count}")
+        
+        print("\n📋 Final Summary:")
+        print(f"   Video ID: {result['video_id']}")
+        print(f"   User ID: {result['user_id']}")
+        print(f"   Duration: {result['duration_ms']}ms ({result['duration_ms']/1000:.1f}s)")
+        print(f"   Frames extracted: {result['frames_extracted']}")
+        print(f"   Segments in DB: {segment_count}")
+        print(f"   Status: {result['status']}")
+        
+        print("\n💡 Test data remains in database for verification")
+        print(f"   You can query this video in search tests using video_id: {video_id}")
+        
+        return 0
+        
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
 
 
 def main():
@@ -1,7 +1,7 @@
 """Test OpenAI semantic similarity."""
 
 import os
-from app.utils.openai_filter import calculate_text_similarity
+from app.utils.openai_filter import calculate_text_similarity_batch
 
 # Test cases
 test_cases = [
@@ -14,8 +14,10 @@ test_cases = [
 print("🧪 Testing OpenAI Semantic Similarity\n")
 print("="*60)
 
-for query, caption in test_cases:
-    score = calculate_text_similarity(query, caption)
+# One batched request per distinct query instead of one per pair
+scores = calculate_text_similarity_batch(test_cases)
+
+for (query, caption), score in zip(test_cases, scores):
     print(f"\nQuery: '{query}'")
     print(f"Caption: '{caption}'")
     print(f"Similarity: {score:.3f} ({score*100:.1f}%)")
@@ -22,27 +22,24 @@ response = client.embeddings.create(
     input=[query, caption]
 )
 
-query_emb = np.array(response.data[0].embedding)
-caption_emb = np.array(response.data[1].embedding)
+# (2, D) matrix: row 0 is the query, row 1 the caption
+embs = np.array([item.embedding for item in response.data])
+query_emb, caption_emb = embs
 
 print(f"\nQuery embedding shape: {query_emb.shape}")
 print(f"Caption embedding shape: {caption_emb.shape}")
 print(f"Query embedding first 5 values: {query_emb[:5]}")
 print(f"Caption embedding first 5 values: {caption_emb[:5]}")
 
-# Check if normalized
-query_norm = np.linalg.norm(query_emb)
-caption_norm = np.linalg.norm(caption_emb)
-print(f"\nQuery norm: {query_norm:.6f}")
-print(f"Caption norm: {caption_norm:.6f}")
+# OpenAI embeddings are unit-length; check both in one call
+norms = np.linalg.norm(embs, axis=1)
+print(f"\nQuery norm: {norms[0]:.6f}")
+print(f"Caption norm: {norms[1]:.6f}")
+assert np.allclose(norms, 1.0, atol=1e-3), f"Embeddings not normalized: {norms}"
 
-# Calculate dot product (for normalized vectors, this IS the cosine similarity)
-dot_product = np.dot(query_emb, caption_emb)
-print(f"\nDot product: {dot_product:.6f}")
-
-# Manual cosine similarity
-cosine_sim = dot_product / (query_norm * caption_norm)
-print(f"Cosine similarity (manual): {cosine_sim:.6f} ({cosine_sim*100:.1f}%)")
+# For normalized vectors, the dot product IS the cosine similarity
+cosine_sim = query_emb @ caption_emb
+print(f"\nCosine similarity (dot product): {cosine_sim:.6f} ({cosine_sim*100:.1f}%)")
 
 print("\n" + "="*60)
 print("✅ Expected: ~0.80-0.90 (80-90%)")
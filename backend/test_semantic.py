@@ -1,6 +1,6 @@
 """Test Sentence Transformers semantic similarity."""
 
-from app.utils.openai_filter import calculate_text_similarity
+from app.utils.openai_filter import calculate_text_similarity_batch
 
 # Test cases
 test_cases = [
@@ -15,8 +15,10 @@ test_cases = [
 print("🧪 Testing Sentence Transformers Semantic Similarity\n")
 print("="*60)
 
-for query, caption in test_cases:
-    score = calculate_text_similarity(query, caption)
+# One batched request per distinct query instead of one per pair
+scores = calculate_text_similarity_batch(test_cases)
+
+for (query, caption), score in zip(test_cases, scores):
     badge = "✅" if score >= 0.7 else "⚠️" if score >= 0.5 else "❌"
     print(f"\n{badge} Query: '{query}'")
     print(f"   Caption: '{caption}'")
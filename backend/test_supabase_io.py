@@ -2,8 +2,8 @@
 """Test Supabase I/O utilities."""
 
 import uuid
-import tempfile
 import psycopg
+import numpy as np
 from PIL import Image
 from app.core.config import settings
 from worker.utils.supabase_io import (
@@ -15,7 +15,7 @@ from worker.utils.supabase_io import (
     count_segments,
     update_video_status,
     upload_to_storage,
-    download_from_storage
+    download_from_storage_bytes
 )
 
 
@@ -77,8 +77,10 @@ def test_upload_frame():
     print("Test 1: Upload Frame to Storage")
     print("=" * 60)
     
-    # Create test image
-    test_image = Image.new("RGB", (640, 480), color=(255, 100, 50))
+    # Create test image (solid color filled by numpy in one pass)
+    pixels = np.empty((480, 640, 3), dtype=np.uint8)
+    pixels[...] = (255, 100, 50)
+    test_image = Image.fromarray(pixels)
     
     # Generate unique path
     test_user_id = str(uuid.uuid4())
@@ -151,8 +153,8 @@ def test_insert_segment(video_id: str, frame_path: str):
     print("Test 3: Insert Segment with Embedding")
     print("=" * 60)
     
-    # Create mock embedding (512 dimensions)
-    mock_embedding = [0.01 * i for i in range(512)]
+    # Create mock embedding (512 dimensions), float32 like ingest_video passes
+    mock_embedding = np.arange(512, dtype=np.float32) * 0.01
     
     print(f"\n📝 Inserting segment...")
     print(f"   Video ID: {video_id}")
@@ -225,10 +227,7 @@ def test_storage_round_trip():
         
         # Download
         print(f"\n📥 Downloading test file...")
-        with tempfile.NamedTemporaryFile(mode='rb', delete=False) as tmp:
-            download_from_storage("frames", test_path, tmp.name)
-            tmp.seek(0)
-            downloaded_data = tmp.read()
+        downloaded_data = download_from_storage_bytes("frames", test_path)
         
         # Verify
         if downloaded_data == test_data:
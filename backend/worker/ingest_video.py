@@ -12,29 +12,88 @@ Example:
 import sys
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
+import torch
+from PIL import Image
 
-from worker.utils.ffmpeg import probe_video, extract_frames
-from worker.utils.embeddings import get_model
-from worker.utils.captioning import generate_captions_batch
+from worker.utils.ffmpeg import probe_video, extract_frames, create_thumbnail
+from worker.utils.embeddings import EmbeddingModel, get_model
+from worker.utils.pipeline import prefetch
+from worker.utils.captioning import generate_captions_batch, get_caption_model
 from worker.utils.supabase_io import (
     upload_frame,
     insert_video,
-    insert_segment,
+    insert_segments,
     update_video_status,
-    upload_to_storage
+    upload_to_storage,
+    VideoOwnershipError
 )
 from app.core.config import settings
 
 
+# Frame uploads in flight at once (each is one HTTPS request to Storage)
+UPLOAD_CONCURRENCY = 16
+
+# Shared across batches; JPEG encoding and socket I/O release the GIL
+_upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY, thread_name_prefix="frame-upload")
+
+# Set once this process has run the warm-up batch (see load_models)
+_models_warmed = False
+
+
+def load_models(batch_size: int) -> EmbeddingModel:
+    """
+    Load the CLIP and BLIP models, in parallel, and warm them up.
+    
+    Both are process-wide singletons, so this only does real work on a
+    worker's first video. Loading is mostly file I/O and weight
+    initialization, which overlap well on two threads. The warm-up runs one
+    dummy batch through both models so allocator pools, cuDNN autotuning
+    and torch.compile (TORCH_COMPILE) are paid before the first real batch.
+    
+    Args:
+        batch_size: Batch size the ingest loop will use
+    
+    Returns:
+        The CLIP EmbeddingModel
+    """
+    global _models_warmed
+    
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-load") as pool:
+        clip = pool.submit(
+            get_model,
+            model_name=settings.MODEL_NAME,
+            pretrained=settings.MODEL_PRETRAIN,
+            compile_image_encoder=settings.TORCH_COMPILE
+        )
+        blip = pool.submit(get_caption_model, compile_vision_encoder=settings.TORCH_COMPILE)
+        model = clip.result()
+        blip.result()
+    
+    if not _models_warmed:
+        if model.device.startswith("cuda"):
+            # Frame sizes are fixed per video, so autotuned kernels get reused
+            torch.backends.cudnn.benchmark = True
+        
+        size = settings.FRAME_MAX_SIZE or 384
+        dummy_batch = [Image.new("RGB", (size, size))] * batch_size
+        model.encode_images_batch(dummy_batch)
+        generate_captions_batch(dummy_batch)
+        _models_warmed = True
+    
+    return model
+
+
 def ingest_video(
     video_path: str,
     video_id: str,
     user_id: str,
     fps: float = 1.0,
     batch_size: int = 10,
-    upload_video: bool = False
+    upload_video: bool = False,
+    storage_path: Optional[str] = None
 ) -> dict:
     """
     Ingest video: extract frames, compute embeddings, store in Supabase.
@@ -46,6 +105,8 @@ def ingest_video(
         fps: Frames per second to extract (default: 1.0)
         batch_size: Number of frames to process in batch (default: 10)
         upload_video: Whether to upload original video to storage (default: False)
+        storage_path: Path in BUCKET_VIDEOS if the original is already in storage
+            (client uploaded directly); skips the upload
     
     Returns:
         dict with summary: {
@@ -79,148 +140,262 @@ def ingest_video(
         
         # Step 2: Upload original video (optional)
         video_url = None
-        if upload_video:
+        if storage_path:
+            print("\n⏭️  Step 2: Original already in storage (direct upload)")
+            video_url = f"{settings.BUCKET_VIDEOS}/{storage_path}"
+        elif upload_video:
             print("\n📤 Step 2: Uploading original video...")
             video_filename = Path(video_path).name
             storage_path = f"{user_id}/{video_id}/{video_filename}"
             
+            # Streamed from disk, so the video is never held in memory
             with open(video_path, 'rb') as f:
-                video_bytes = f.read()
-            
-            upload_to_storage(
-                settings.BUCKET_VIDEOS,
-                storage_path,
-                video_bytes,
-                content_type="video/mp4"
-            )
+                upload_to_storage(
+                    settings.BUCKET_VIDEOS,
+                    storage_path,
+                    f,
+                    content_type="video/mp4"
+                )
             video_url = f"{settings.BUCKET_VIDEOS}/{storage_path}"
             print(f"   ✅ Uploaded to: {video_url}")
         else:
             print("\n⏭️  Step 2: Skipping video upload (upload_video=False)")
             video_url = f"local://{video_path}"
         
-        # Step 3: Insert video record
-        print("\n📝 Step 3: Creating video record...")
-        insert_video(
+        print(f"\n🎞️  Extracting frames at {fps} fps...")
+        frames = extract_frames(
+            video_path,
+            fps=fps,
+            max_size=settings.FRAME_MAX_SIZE or None,
+            hwaccel=settings.FFMPEG_HWACCEL or None,
+            metadata=metadata
+        )
+        return _ingest_frames(
+            # Decode the next batches while the current one is embedded,
+            # captioned and stored
+            prefetch(frames, depth=2 * batch_size),
             video_id=video_id,
             user_id=user_id,
-            url=video_url,
+            video_url=video_url,
             duration_ms=duration_ms,
             width=width,
             height=height,
-            status="processing"
+            batch_size=batch_size
         )
-        print(f"   ✅ Video record created (status: processing)")
         
-        # Step 4: Load models
-        print("\n🤖 Step 4: Loading AI models...")
-        model = get_model(
-            model_name=settings.MODEL_NAME,
-            pretrained=settings.MODEL_PRETRAIN
+    except Exception as e:
+        _mark_failed(video_id, e)
+        raise
+
+
+def ingest_video_from_frames(
+    frames: list[tuple[int, Image.Image]],
+    video_id: str,
+    user_id: str,
+    batch_size: int = 10
+) -> dict:
+    """
+    Ingest already-decoded frames, skipping probe and ffmpeg decoding.
+    
+    Useful for synthetic test data, where encoding a video only to decode it
+    again is wasted work.
+    
+    Args:
+        frames: (timestamp_ms, PIL Image) tuples in timestamp order
+        video_id: UUID for this video
+        user_id: User UUID who owns this video
+        batch_size: Number of frames to process in batch (default: 10)
+    
+    Returns:
+        Same summary dict as ingest_video
+    """
+    if not frames:
+        raise ValueError("No frames to ingest")
+    
+    print("=" * 60)
+    print(f"🎬 Frame Ingestion Pipeline")
+    print("=" * 60)
+    print(f"Frames: {len(frames)}")
+    print(f"Video ID: {video_id}")
+    print(f"User ID: {user_id}")
+    print()
+    
+    width, height = frames[0][1].size
+    
+    try:
+        return _ingest_frames(
+            frames,
+            video_id=video_id,
+            user_id=user_id,
+            video_url=f"local://{video_id}",
+            duration_ms=frames[-1][0],
+            width=width,
+            height=height,
+            batch_size=batch_size
         )
-        print(f"   ✅ OpenCLIP model loaded: {settings.MODEL_NAME}")
-        
-        # Pre-load caption model (will be lazy-loaded on first use)
-        from worker.utils.captioning import get_caption_model
-        get_caption_model()
-        print(f"   ✅ BLIP captioning model loaded")
+    
+    except Exception as e:
+        _mark_failed(video_id, e)
+        raise
+
+
+def _mark_failed(video_id: str, e: Exception) -> None:
+    """Report a failed ingestion and set the video's status to error."""
+    print(f"\n❌ Ingestion failed: {e}")
+    
+    # The video is someone else's; leave its status alone
+    if isinstance(e, VideoOwnershipError):
+        return
+    
+    # Update video status to error
+    try:
+        update_video_status(video_id, status="error", error_msg=str(e))
+        print(f"   Video status updated to: error")
+    except:
+        pass
+
+
+def _ingest_frames(
+    frames: Iterable[tuple[int, Image.Image]],
+    video_id: str,
+    user_id: str,
+    video_url: str,
+    duration_ms: int,
+    width: int,
+    height: int,
+    batch_size: int
+) -> dict:
+    """
+    Steps 3-6 of ingestion: create the video record, then embed, caption and
+    store frames in batches, then mark the video ready.
+    
+    Returns:
+        Summary dict (see ingest_video)
+    """
+    # Step 3: Insert video record
+    print("\n📝 Step 3: Creating video record...")
+    insert_video(
+        video_id=video_id,
+        user_id=user_id,
+        url=video_url,
+        duration_ms=duration_ms,
+        width=width,
+        height=height,
+        status="processing"
+    )
+    print(f"   ✅ Video record created (status: processing)")
+    
+    # Step 4: Load models
+    print("\n🤖 Step 4: Loading AI models...")
+    model = load_models(batch_size)
+    print(f"   ✅ OpenCLIP ({settings.MODEL_NAME}) and BLIP captioning models ready")
+    
+    # Step 5: Process frames in batches
+    print(f"\n🎞️  Step 5: Processing frames...")
+    
+    frame_buffer = []
+    timestamp_buffer = []
+    frames_extracted = 0
+    segments_inserted = 0
+    thumbnail_url = None
+    
+    def flush_batch(final: bool) -> None:
+        """
+        Process the buffered frames.
         
-        # Step 5: Extract frames and process in batches
-        print(f"\n🎞️  Step 5: Extracting frames at {fps} fps...")
+        The first batch also uploads the thumbnail, and the final batch
+        marks the video ready in the same transaction as its segments.
+        """
+        nonlocal segments_inserted, thumbnail_url
         
-        frame_buffer = []
-        timestamp_buffer = []
-        frames_extracted = 0
-        segments_inserted = 0
-        first_frame_uploaded = False
+        first_batch = thumbnail_url is None
+        if first_batch:
+            thumbnail_url = f"{settings.BUCKET_FRAMES}/{thumbnail_path(user_id, video_id)}"
         
-        for timestamp_ms, frame_image in extract_frames(video_path, fps=fps):
-            # Upload first frame as thumbnail
-            if not first_frame_uploaded:
-                print("   📸 Generating thumbnail from first frame...")
-                thumbnail_path = f"{user_id}/{video_id}/thumbnail.jpg"
-                upload_frame(
-                    settings.BUCKET_FRAMES,
-                    thumbnail_path,
-                    frame_image,
-                    quality=90
-                )
-                thumbnail_url = f"{settings.BUCKET_FRAMES}/{thumbnail_path}"
-                
-                # Update video record with thumbnail
-                insert_video(
-                    video_id=video_id,
-                    user_id=user_id,
-                    url=video_url,
-                    duration_ms=duration_ms,
-                    width=width,
-                    height=height,
-                    status="processing",
-                    thumbnail_url=thumbnail_url
-                )
-                print(f"   ✅ Thumbnail uploaded: {thumbnail_path}")
-                first_frame_uploaded = True
-            
-            frame_buffer.append(frame_image)
-            timestamp_buffer.append(timestamp_ms)
-            frames_extracted += 1
-            
-            # Process batch when buffer is full
-            if len(frame_buffer) >= batch_size:
-                segments_inserted += process_frame_batch(
-                    frame_buffer,
-                    timestamp_buffer,
-                    video_id,
-                    user_id,
-                    model
-                )
-                frame_buffer.clear()
-                timestamp_buffer.clear()
-                
-                print(f"   Processed {frames_extracted} frames, {segments_inserted} segments inserted...", end='\r')
+        segments_inserted += process_frame_batch(
+            frame_buffer,
+            timestamp_buffer,
+            video_id,
+            user_id,
+            model,
+            mark_ready=final,
+            # A single-batch video gets its thumbnail with the ready status
+            thumbnail=frame_buffer[0] if first_batch else None
+        )
         
-        # Process remaining frames
-        if frame_buffer:
-            segments_inserted += process_frame_batch(
-                frame_buffer,
-                timestamp_buffer,
-                video_id,
-                user_id,
-                model
+        if first_batch and not final:
+            # Set once the thumbnail is uploaded (process_frame_batch waited)
+            insert_video(
+                video_id=video_id,
+                user_id=user_id,
+                url=video_url,
+                duration_ms=duration_ms,
+                width=width,
+                height=height,
+                status="processing",
+                thumbnail_url=thumbnail_url
             )
+            print(f"   📸 Thumbnail set to first frame: {thumbnail_url}")
         
-        print(f"\n   ✅ Extracted {frames_extracted} frames")
-        print(f"   ✅ Inserted {segments_inserted} segments")
+        frame_buffer.clear()
+        timestamp_buffer.clear()
+    
+    for timestamp_ms, frame_image in frames:
+        # A full batch is processed once the next frame shows up, so the
+        # last batch (however full) is always flushed after the loop, as
+        # the final one
+        if len(frame_buffer) >= batch_size:
+            flush_batch(final=False)
+            print(f"   Processed {frames_extracted} frames, {segments_inserted} segments inserted...", end='\r')
         
-        # Step 6: Update video status to ready
-        print("\n✅ Step 6: Finalizing...")
+        frame_buffer.append(frame_image)
+        timestamp_buffer.append(timestamp_ms)
+        frames_extracted += 1
+    
+    # Step 6: The last batch's segments and the "ready" status go in one
+    # transaction
+    print("\n✅ Step 6: Finalizing...")
+    if frame_buffer:
+        flush_batch(final=True)
+    else:
         update_video_status(video_id, status="ready")
-        print(f"   ✅ Video status: ready")
-        
-        print("\n" + "=" * 60)
-        print("🎉 Ingestion Complete!")
-        print("=" * 60)
-        
-        return {
-            'video_id': video_id,
-            'user_id': user_id,
-            'duration_ms': duration_ms,
-            'frames_extracted': frames_extracted,
-            'segments_inserted': segments_inserted,
-            'status': 'ready'
-        }
-        
-    except Exception as e:
-        print(f"\n❌ Ingestion failed: {e}")
-        
-        # Update video status to error
-        try:
-            update_video_status(video_id, status="error", error_msg=str(e))
-            print(f"   Video status updated to: error")
-        except:
-            pass
-        
-        raise
+    
+    print(f"   ✅ Extracted {frames_extracted} frames")
+    print(f"   ✅ Inserted {segments_inserted} segments")
+    print(f"   ✅ Video status: ready")
+    
+    print("\n" + "=" * 60)
+    print("🎉 Ingestion Complete!")
+    print("=" * 60)
+    
+    return {
+        'video_id': video_id,
+        'user_id': user_id,
+        'duration_ms': duration_ms,
+        'frames_extracted': frames_extracted,
+        'segments_inserted': segments_inserted,
+        'status': 'ready'
+    }
+
+
+def frame_path(user_id: str, video_id: str, timestamp_ms: int) -> str:
+    """Path of a frame's JPEG within BUCKET_FRAMES."""
+    return f"{user_id}/{video_id}/frame_{timestamp_ms:08d}.jpg"
+
+
+def thumbnail_path(user_id: str, video_id: str) -> str:
+    """Path of a video's thumbnail within BUCKET_FRAMES."""
+    return f"{user_id}/{video_id}/thumbnail.jpg"
+
+
+def _upload_thumbnail(user_id: str, video_id: str, frame: Image.Image) -> None:
+    """Downscale a frame (320px, like the list view shows it) and upload it as the thumbnail."""
+    upload_frame(
+        settings.BUCKET_FRAMES,
+        thumbnail_path(user_id, video_id),
+        create_thumbnail(frame.copy()),
+        quality=90
+    )
 
 
 def process_frame_batch(
@@ -228,7 +403,9 @@ def process_frame_batch(
     timestamps: list,
     video_id: str,
     user_id: str,
-    model
+    model,
+    mark_ready: bool = False,
+    thumbnail: Optional[Image.Image] = None
 ) -> int:
     """
     Process a batch of frames: encode embeddings, generate captions, upload frames, insert segments.
@@ -239,40 +416,63 @@ def process_frame_batch(
         video_id: Video UUID
         user_id: User UUID
         model: OpenCLIP model instance
+        mark_ready: Last batch: mark the video ready in the segments' transaction
+        thumbnail: Frame to upload as the video's thumbnail (first batch);
+            also set as the thumbnail when marking the video ready
     
     Returns:
         Number of segments inserted
     """
+    frame_paths = [frame_path(user_id, video_id, timestamp_ms) for timestamp_ms in timestamps]
+    
+    # Start the frame uploads first so JPEG encoding and network I/O overlap
+    # with the model work below
+    uploads = [
+        _upload_pool.submit(upload_frame, settings.BUCKET_FRAMES, frame_path, frame, quality=85)
+        for frame, frame_path in zip(frames, frame_paths)
+    ]
+    if thumbnail is not None:
+        uploads.append(_upload_pool.submit(_upload_thumbnail, user_id, video_id, thumbnail))
+    
     # Compute embeddings in batch (efficient)
     embeddings = model.encode_images_batch(frames)
     
     # Generate captions in batch
     captions = generate_captions_batch(frames)
     
-    # Upload frames and insert segments
-    for i, (frame, timestamp_ms, embedding, caption) in enumerate(zip(frames, timestamps, embeddings, captions)):
-        # Generate frame path
-        frame_filename = f"frame_{timestamp_ms:08d}.jpg"
-        frame_path = f"{user_id}/{video_id}/{frame_filename}"
-        
-        # Upload frame to storage
-        upload_frame(
-            settings.BUCKET_FRAMES,
-            frame_path,
-            frame,
-            quality=85
-        )
-        
-        # Insert segment with embedding and caption
-        insert_segment(
+    # Embed captions in the CLIP text space so search can compare them to the
+    # query embedding (SEMANTIC_FILTER=embedding)
+    caption_embeddings = model.encode_texts_batch(captions)
+    
+    ready_thumbnail_url = None
+    if mark_ready:
+        # The video must not turn ready before its last frames exist
+        for upload in uploads:
+            upload.result()
+        if thumbnail is not None:
+            ready_thumbnail_url = f"{settings.BUCKET_FRAMES}/{thumbnail_path(user_id, video_id)}"
+    
+    # Insert all segments (embedding + caption) in one transaction. Earlier
+    # batches don't wait for their uploads: the video stays "processing"
+    # (hidden from search) until the final batch.
+    insert_segments([
+        dict(
             video_id=video_id,
             t_start_ms=timestamp_ms,
             t_end_ms=timestamp_ms,
             frame_url=f"{settings.BUCKET_FRAMES}/{frame_path}",
-            emb=embedding.tolist(),  # Convert numpy array to list
+            emb=embedding,
             modality="vision",
-            caption={"text": caption}  # Store caption in JSONB field
+            caption={"text": caption},  # Store caption in JSONB field
+            caption_emb=caption_embedding
+        )
+        for timestamp_ms, frame_path, embedding, caption, caption_embedding in zip(
+            timestamps, frame_paths, embeddings, captions, caption_embeddings
         )
+    ], ready_video_id=video_id if mark_ready else None, thumbnail_url=ready_thumbnail_url)
+    
+    for upload in uploads:
+        upload.result()  # Re-raises the first failed upload
     
     return len(frames)
 
@@ -4,19 +4,31 @@ import torch
 from PIL import Image
 from transformers import BlipProcessor, BlipForConditionalGeneration
 from typing import Optional
+from worker.utils.device import pick_device, uses_half_precision
 
 
+# Decoding settings. BLIP captions are ~10 tokens, and 3 beams give
+# captions close to 5 beams' at ~60% of the decoder passes.
+CAPTION_NUM_BEAMS = 3
+CAPTION_MAX_NEW_TOKENS = 30
+
 # Global caption model (lazy-loaded)
 _caption_processor: Optional[BlipProcessor] = None
 _caption_model: Optional[BlipForConditionalGeneration] = None
 
 
-def get_caption_model(device: str = "cpu"):
+def get_caption_model(device: Optional[str] = None, compile_vision_encoder: bool = False):
     """
     Get or create global BLIP caption model.
     
+    The model runs in float16 on CUDA/MPS and with int8 dynamically
+    quantized Linear layers on CPU (like the cross-encoder in scorer.py).
+    
     Args:
-        device: Device to run on ("cpu" or "cuda")
+        device: Device to run on ("cpu", "cuda" or "mps"; default: fastest available)
+        compile_vision_encoder: torch.compile the vision encoder (CUDA only).
+            It runs once per batch on fixed-size images, unlike the text
+            decoder, whose sequence grows every beam-search step.
     
     Returns:
         tuple of (processor, model)
@@ -24,39 +36,54 @@ def get_caption_model(device: str = "cpu"):
     global _caption_processor, _caption_model
     
     if _caption_processor is None or _caption_model is None:
+        device = device or pick_device()
         print("Loading BLIP captioning model (Salesforce/blip-image-captioning-base)...")
         _caption_processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-        _caption_model = BlipForConditionalGeneration.from_pretrained(
+        model = BlipForConditionalGeneration.from_pretrained(
             "Salesforce/blip-image-captioning-base"
-        ).to(device)
-        _caption_model.eval()
+        )
+        
+        if uses_half_precision(device):
+            model = model.to(device, dtype=torch.float16)
+            if compile_vision_encoder and device.startswith("cuda"):
+                # dynamic=None: a short last batch triggers one recompile
+                # with a dynamic batch dimension rather than one per size
+                model.vision_model = torch.compile(model.vision_model)
+        else:
+            model = torch.ao.quantization.quantize_dynamic(
+                model,
+                {torch.nn.Linear},
+                dtype=torch.qint8
+            )
+        
+        _caption_model = model.eval()
         print("✅ Caption model loaded")
     
     return _caption_processor, _caption_model
 
 
-def generate_caption(image: Image.Image, device: str = "cpu") -> str:
+def generate_caption(image: Image.Image, device: Optional[str] = None) -> str:
     """
     Generate caption for an image.
     
     Args:
         image: PIL Image (RGB)
-        device: Device to run on
+        device: Device to load the model on if it isn't loaded yet
     
     Returns:
         Caption string
     """
     processor, model = get_caption_model(device)
     
-    with torch.no_grad():
+    with torch.inference_mode():
         # Process image
-        inputs = processor(image, return_tensors="pt").to(device)
+        inputs = processor(image, return_tensors="pt").to(model.device, model.dtype)
         
         # Generate caption
         outputs = model.generate(
             **inputs,
-            max_length=50,
-            num_beams=5,
+            max_new_tokens=CAPTION_MAX_NEW_TOKENS,
+            num_beams=CAPTION_NUM_BEAMS,
             early_stopping=True
         )
         
@@ -66,28 +93,28 @@ def generate_caption(image: Image.Image, device: str = "cpu") -> str:
     return caption
 
 
-def generate_captions_batch(images: list[Image.Image], device: str = "cpu") -> list[str]:
+def generate_captions_batch(images: list[Image.Image], device: Optional[str] = None) -> list[str]:
     """
     Generate captions for multiple images in batch.
     
     Args:
         images: List of PIL Images
-        device: Device to run on
+        device: Device to load the model on if it isn't loaded yet
     
     Returns:
         List of caption strings
     """
     processor, model = get_caption_model(device)
     
-    with torch.no_grad():
+    with torch.inference_mode():
         # Process images in batch
-        inputs = processor(images, return_tensors="pt", padding=True).to(device)
+        inputs = processor(images, return_tensors="pt", padding=True).to(model.device, model.dtype)
         
         # Generate captions
         outputs = model.generate(
             **inputs,
-            max_length=50,
-            num_beams=5,
+            max_new_tokens=CAPTION_MAX_NEW_TOKENS,
+            num_beams=CAPTION_NUM_BEAMS,
             early_stopping=True
         )
         
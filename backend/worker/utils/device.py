@@ -0,0 +1,22 @@
+"""Torch device selection for the worker models."""
+
+import torch
+
+
+def pick_device() -> str:
+    """
+    Pick the fastest available torch device.
+
+    Returns:
+        "cuda", "mps" (Apple Silicon) or "cpu"
+    """
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def uses_half_precision(device: str) -> bool:
+    """True for devices where the models run in float16."""
+    return device.startswith(("cuda", "mps"))
@@ -5,7 +5,9 @@ import open_clip
 import torch
 from PIL import Image
 from typing import Optional
+from torchvision.transforms import CenterCrop, Normalize, Resize, ToTensor
 from transformers import BlipProcessor, BlipForConditionalGeneration
+from worker.utils.device import pick_device, uses_half_precision
 
 
 class EmbeddingModel:
@@ -15,7 +17,8 @@ class EmbeddingModel:
         self,
         model_name: str = "ViT-B-32",
         pretrained: str = "openai",
-        device: str = "cpu"
+        device: Optional[str] = None,
+        compile_image_encoder: bool = False
     ):
         """
         Initialize OpenCLIP model.
@@ -23,24 +26,51 @@ class EmbeddingModel:
         Args:
             model_name: Model architecture (e.g., "ViT-B-32", "ViT-B-16")
             pretrained: Pretrained weights (e.g., "openai", "laion2b_s34b_b79k")
-            device: Device to run on ("cpu" or "cuda")
+            device: Device to run on ("cpu", "cuda" or "mps"; default: fastest available)
+            compile_image_encoder: torch.compile the image encoder for
+                encode_images_batch (CUDA graphs on CUDA). The first batches
+                are slow while it compiles, so only worth it for ingestion.
         """
+        device = device or pick_device()
         self.device = device
         self.model_name = model_name
         self.pretrained = pretrained
         
-        print(f"Loading OpenCLIP model: {model_name} ({pretrained})...")
+        # float16 on GPUs; embeddings are returned as float32 either way
+        half = uses_half_precision(device)
+        self.dtype = torch.float16 if half else torch.float32
+        
+        print(f"Loading OpenCLIP model: {model_name} ({pretrained}) on {device}...")
         self.model, _, self.preprocess = open_clip.create_model_and_transforms(
             model_name,
             pretrained=pretrained,
+            precision="fp16" if half else "fp32",
             device=device
         )
         self.tokenizer = open_clip.get_tokenizer(model_name)
         self.model.eval()
         
+        # Parameters for the fused NumPy version of self.preprocess used by
+        # encode_images_batch (None: unrecognized transform, use preprocess)
+        self._fused_preprocess = _fused_preprocess_params(self.preprocess)
+        
+        # Reusable (N, 3, H, W) input buffer for encode_images_batch, pinned
+        # on CUDA so the host-to-device copy can be asynchronous
+        self._batch_buf: Optional[torch.Tensor] = None
+        
+        # Compiled graphs are specialized to one input shape, so compiled
+        # batches always use the whole buffer (see encode_images_batch)
+        self._compiled_encode_image = None
+        if compile_image_encoder:
+            self._compiled_encode_image = torch.compile(
+                self.model.encode_image,
+                mode="reduce-overhead" if device.startswith("cuda") else "default",
+                dynamic=False
+            )
+        
         # Get embedding dimension
-        with torch.no_grad():
-            dummy_text = self.tokenizer(["test"])
+        with torch.inference_mode():
+            dummy_text = self.tokenizer(["test"]).to(self.device)
             self.emb_dim = self.model.encode_text(dummy_text).shape[-1]
         
         print(f"✅ Model loaded. Embedding dim: {self.emb_dim}")
@@ -55,16 +85,16 @@ class EmbeddingModel:
         Returns:
             numpy array of shape (emb_dim,), L2-normalized
         """
-        with torch.no_grad():
+        with torch.inference_mode():
             # Preprocess and add batch dimension
-            image_tensor = self.preprocess(image).unsqueeze(0).to(self.device)
+            image_tensor = self.preprocess(image).unsqueeze(0).to(self.device, self.dtype)
             
             # Encode and normalize
             features = self.model.encode_image(image_tensor)
             features = features / features.norm(dim=-1, keepdim=True)
             
             # Convert to numpy
-            embedding = features.cpu().numpy().squeeze()
+            embedding = features.float().cpu().numpy().squeeze()
         
         return embedding
     
@@ -78,7 +108,7 @@ class EmbeddingModel:
         Returns:
             numpy array of shape (emb_dim,), L2-normalized
         """
-        with torch.no_grad():
+        with torch.inference_mode():
             # Tokenize
             text_tokens = self.tokenizer([text]).to(self.device)
             
@@ -87,7 +117,7 @@ class EmbeddingModel:
             features = features / features.norm(dim=-1, keepdim=True)
             
             # Convert to numpy
-            embedding = features.cpu().numpy().squeeze()
+            embedding = features.float().cpu().numpy().squeeze()
         
         return embedding
     
@@ -101,22 +131,167 @@ class EmbeddingModel:
         Returns:
             numpy array of shape (len(images), emb_dim), L2-normalized
         """
-        with torch.no_grad():
-            # Stack preprocessed images
-            image_tensors = torch.stack([
-                self.preprocess(img) for img in images
-            ]).to(self.device)
+        with torch.inference_mode():
+            # Preprocess each image straight into its row of the batch buffer
+            # (no per-batch torch.stack copy or allocation)
+            if self._fused_preprocess is not None:
+                crop_h, crop_w = self._fused_preprocess['crop_size']
+                batch = self._get_batch_buffer(len(images), torch.Size((3, crop_h, crop_w)))
+                rows = batch.numpy()
+                for i, img in enumerate(images):
+                    self._preprocess_into(img, rows[i])
+            else:
+                first = self.preprocess(images[0])
+                batch = self._get_batch_buffer(len(images), first.shape)
+                batch[0] = first
+                for i, img in enumerate(images[1:], 1):
+                    batch[i] = self.preprocess(img)
+            
+            if self._compiled_encode_image is not None:
+                # Pad short batches to the full buffer (leftover rows are
+                # encoded and dropped) so the compiled graph is reused
+                n = len(images)
+                image_tensors = self._batch_buf.to(self.device, self.dtype, non_blocking=True)
+                features = self._compiled_encode_image(image_tensors)[:n]
+            else:
+                image_tensors = batch.to(self.device, self.dtype, non_blocking=True)
+                features = self.model.encode_image(image_tensors)
+            
+            # Normalize
+            features = features / features.norm(dim=-1, keepdim=True)
+            
+            # Convert to numpy
+            embeddings = features.float().cpu().numpy()
+        
+        return embeddings
+    
+    def _preprocess_into(self, image: Image.Image, out: np.ndarray) -> None:
+        """
+        Same result as self.preprocess(image), written into out (3, H, W float32).
+        
+        Resize and crop are done by PIL exactly as torchvision does them. The
+        ToTensor + Normalize passes (uint8 -> /255 -> -mean -> /std, each a
+        full pass with its own temporary) become one multiply and one add,
+        in place in the output row.
+        """
+        params = self._fused_preprocess
+        size = params['resize_size']
+        crop_h, crop_w = params['crop_size']
+        
+        # Resize the shorter side to size (torchvision's rounding)
+        w, h = image.size
+        if w <= h:
+            new_w, new_h = size, int(size * h / w)
+        else:
+            new_w, new_h = int(size * w / h), size
+        if (new_w, new_h) != (w, h):
+            image = image.resize((new_w, new_h), params['resample'])
+        
+        # Center crop
+        top = int(round((new_h - crop_h) / 2.0))
+        left = int(round((new_w - crop_w) / 2.0))
+        image = image.crop((left, top, left + crop_w, top + crop_h))
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        # (pixel / 255 - mean) / std == pixel * scale + bias, written through
+        # an HWC view of the CHW row
+        out_hwc = out.transpose(1, 2, 0)
+        np.multiply(np.asarray(image), params['scale'], out=out_hwc)
+        out_hwc += params['bias']
+    
+    def _get_batch_buffer(self, n: int, image_shape: torch.Size) -> torch.Tensor:
+        """
+        Return an (n, *image_shape) view of the reusable input buffer.
+        
+        The buffer only grows. Reuse is safe because every encode call ends
+        with a blocking .cpu() copy, so no transfer from it is still in flight.
+        """
+        buf = self._batch_buf
+        if buf is None or buf.shape[0] < n or buf.shape[1:] != image_shape:
+            buf = torch.zeros(
+                (n, *image_shape),
+                pin_memory=self.device.startswith("cuda")
+            )
+            self._batch_buf = buf
+        return buf[:n]
+    
+    def encode_texts_batch(self, texts: list[str]) -> np.ndarray:
+        """
+        Encode multiple texts in a batch.
+        
+        Args:
+            texts: List of strings
+        
+        Returns:
+            numpy array of shape (len(texts), emb_dim), L2-normalized
+        """
+        with torch.inference_mode():
+            # Tokenize
+            text_tokens = self.tokenizer(texts).to(self.device)
             
             # Encode and normalize
-            features = self.model.encode_image(image_tensors)
+            features = self.model.encode_text(text_tokens)
             features = features / features.norm(dim=-1, keepdim=True)
             
             # Convert to numpy
-            embeddings = features.cpu().numpy()
+            embeddings = features.float().cpu().numpy()
         
         return embeddings
 
 
+def _fused_preprocess_params(preprocess) -> Optional[dict]:
+    """
+    Read the geometry and normalization out of an OpenCLIP eval transform.
+    
+    Args:
+        preprocess: torchvision Compose returned by create_model_and_transforms
+    
+    Returns:
+        dict for EmbeddingModel._preprocess_into, or None if the transform
+        isn't the plain Resize -> CenterCrop -> ToTensor -> Normalize chain
+    """
+    resize = crop = normalize = None
+    for t in getattr(preprocess, 'transforms', []):
+        if isinstance(t, Resize):
+            resize = t
+        elif isinstance(t, CenterCrop):
+            crop = t
+        elif isinstance(t, Normalize):
+            normalize = t
+        elif not (isinstance(t, ToTensor) or getattr(t, '__name__', '') == '_convert_to_rgb'):
+            return None
+    
+    if resize is None or crop is None or normalize is None:
+        return None
+    
+    # Only "resize the shorter side to N" is reproduced
+    size = resize.size
+    if not isinstance(size, int):
+        if len(size) != 1:
+            return None
+        size = size[0]
+    if resize.max_size is not None:
+        return None
+    
+    try:
+        resample = Image.Resampling[resize.interpolation.name]
+    except KeyError:
+        return None
+    
+    mean = np.asarray(normalize.mean, dtype=np.float32)
+    std = np.asarray(normalize.std, dtype=np.float32)
+    crop_size = crop.size if len(crop.size) == 2 else (crop.size[0], crop.size[0])
+    
+    return {
+        'resize_size': size,
+        'crop_size': tuple(crop_size),
+        'resample': resample,
+        'scale': 1.0 / (255.0 * std),
+        'bias': -mean / std
+    }
+
+
 # Global model instances (lazy-loaded)
 _model: Optional[EmbeddingModel] = None
 _caption_processor = None
@@ -126,7 +301,8 @@ _caption_model = None
 def get_model(
     model_name: str = "ViT-B-32",
     pretrained: str = "openai",
-    device: str = "cpu"
+    device: Optional[str] = None,
+    compile_image_encoder: bool = False
 ) -> EmbeddingModel:
     """
     Get or create global embedding model instance.
@@ -134,7 +310,8 @@ def get_model(
     Args:
         model_name: Model architecture
         pretrained: Pretrained weights
-        device: Device to run on
+        device: Device to run on (default: fastest available, see pick_device)
+        compile_image_encoder: See EmbeddingModel
     
     Returns:
         EmbeddingModel instance
@@ -145,7 +322,8 @@ def get_model(
         _model = EmbeddingModel(
             model_name=model_name,
             pretrained=pretrained,
-            device=device
+            device=device,
+            compile_image_encoder=compile_image_encoder
         )
     
     return _model
@@ -168,3 +346,9 @@ def encode_images_batch(images: list[Image.Image]) -> np.ndarray:
     model = get_model()
     return model.encode_images_batch(images)
 
+
+def encode_texts_batch(texts: list[str]) -> np.ndarray:
+    """Convenience function: encode batch of texts."""
+    model = get_model()
+    return model.encode_texts_batch(texts)
+
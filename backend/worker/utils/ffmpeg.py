@@ -1,15 +1,60 @@
 """FFmpeg utilities for video processing."""
 
+import io
+import subprocess
+import cv2
 import ffmpeg
 import numpy as np
+import orjson
 from PIL import Image
 from typing import Iterator, Optional
+from app.core.config import settings
+
+
+def _probe_video_in_process(filepath: str) -> dict:
+    """probe_video through OpenCV's bundled libav, without spawning ffprobe."""
+    cap = cv2.VideoCapture(filepath)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open video: {filepath}")
+        
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        
+        return {
+            'duration_ms': int(frame_count / fps * 1000),
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': fps
+        }
+    finally:
+        cap.release()
+
+
+def _extract_single_frame_in_process(filepath: str, timestamp_sec: float) -> Image.Image:
+    """extract_single_frame through OpenCV's bundled libav, without spawning ffmpeg."""
+    cap = cv2.VideoCapture(filepath)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open video: {filepath}")
+        
+        # Seeks to the preceding keyframe and decodes forward to the timestamp
+        cap.set(cv2.CAP_PROP_POS_MSEC, timestamp_sec * 1000)
+        ok, bgr = cap.read()
+        if not ok:
+            raise ValueError(f"Could not extract frame at {timestamp_sec}s")
+        
+        return Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB), mode='RGB')
+    finally:
+        cap.release()
 
 
 def probe_video(filepath: str) -> dict:
     """
     Probe video file to extract metadata.
     
+    Uses OpenCV in-process when settings.VIDEO_IN_PROCESS_DECODE is set.
+    
     Args:
         filepath: Path to video file
     
@@ -17,10 +62,25 @@ def probe_video(filepath: str) -> dict:
         dict with keys: duration_ms, width, height, fps
     
     Raises:
-        ffmpeg.Error: If probe fails
+        RuntimeError: If probe fails
     """
+    if settings.VIDEO_IN_PROCESS_DECODE:
+        return _probe_video_in_process(filepath)
+    
     try:
-        probe = ffmpeg.probe(filepath)
+        # Machine-readable JSON output, parsed with orjson
+        result = subprocess.run(
+            [
+                'ffprobe', '-v', 'error',
+                '-print_format', 'json',
+                '-show_format', '-show_streams',
+                filepath
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True
+        )
+        probe = orjson.loads(result.stdout)
         
         # Find video stream
         video_stream = next(
@@ -54,36 +114,47 @@ def probe_video(filepath: str) -> dict:
             'fps': fps
         }
     
-    except ffmpeg.Error as e:
+    except subprocess.CalledProcessError as e:
         raise RuntimeError(f"FFmpeg probe failed: {e.stderr.decode()}") from e
 
 
-def extract_frames(
+def extract_frames_np(
     filepath: str,
     fps: float = 1.0,
     start_time: Optional[float] = None,
-    end_time: Optional[float] = None
-) -> Iterator[tuple[int, Image.Image]]:
+    end_time: Optional[float] = None,
+    max_size: Optional[int] = None,
+    hwaccel: Optional[str] = None,
+    reuse_buffer: bool = False,
+    metadata: Optional[dict] = None
+) -> Iterator[tuple[int, np.ndarray]]:
     """
-    Extract frames from video at specified FPS.
+    Extract frames from video at specified FPS as numpy arrays.
+    
+    ffmpeg's output is read straight into the array (readinto), so no
+    intermediate bytes object is allocated per frame.
     
     Args:
         filepath: Path to video file
         fps: Frames per second to extract (default 1.0 = 1 frame/sec)
         start_time: Start time in seconds (optional)
         end_time: End time in seconds (optional)
+        max_size: Downscale (in ffmpeg, preserving aspect ratio) so neither
+            side exceeds this many pixels (optional)
+        hwaccel: ffmpeg hardware decoder, e.g. "cuda" or "videotoolbox" (optional)
+        reuse_buffer: Yield the same array for every frame, overwritten by the
+            next one (no per-frame allocation). Only for consumers that copy
+            or drop each frame before asking for the next.
+        metadata: probe_video's result for filepath, if the caller already
+            has it (skips a second ffprobe run)
     
     Yields:
-        Tuple of (timestamp_ms, PIL.Image)
-        
-    Example:
-        for timestamp_ms, frame in extract_frames("video.mp4", fps=1.0):
-            print(f"Frame at {timestamp_ms}ms")
-            frame.save(f"frame_{timestamp_ms}.jpg")
+        Tuple of (timestamp_ms, uint8 array of shape (height, width, 3), RGB)
     """
     try:
         # Get video metadata first
-        metadata = probe_video(filepath)
+        if metadata is None:
+            metadata = probe_video(filepath)
         width = metadata['width']
         height = metadata['height']
         
@@ -93,32 +164,40 @@ def extract_frames(
             input_args['ss'] = start_time
         if end_time is not None:
             input_args['t'] = end_time - (start_time or 0)
+        if hwaccel:
+            input_args['hwaccel'] = hwaccel
+        
+        stream = ffmpeg.input(filepath, **input_args).filter('fps', fps=fps)
+        
+        # Scale inside ffmpeg so only the small frames cross the pipe. The
+        # exact output size is computed here so each frame's byte count is known.
+        if max_size and max(width, height) > max_size:
+            scale = max_size / max(width, height)
+            width = max(1, round(width * scale))
+            height = max(1, round(height * scale))
+            stream = stream.filter('scale', width, height)
         
         # Extract frames at specified FPS, output as raw RGB24 bytes
         process = (
-            ffmpeg
-            .input(filepath, **input_args)
-            .filter('fps', fps=fps)
+            stream
             .output('pipe:', format='rawvideo', pix_fmt='rgb24')
             .run_async(pipe_stdout=True, pipe_stderr=True, quiet=True)
         )
         
         frame_idx = 0
         frame_size = width * height * 3  # RGB = 3 bytes per pixel
+        frame_array = np.empty((height, width, 3), dtype=np.uint8)
         
         while True:
-            # Read one frame worth of bytes
-            raw_frame = process.stdout.read(frame_size)
-            
-            if not raw_frame or len(raw_frame) < frame_size:
-                break
+            if frame_idx and not reuse_buffer:
+                frame_array = np.empty((height, width, 3), dtype=np.uint8)
             
-            # Convert raw bytes to numpy array
-            frame_array = np.frombuffer(raw_frame, dtype=np.uint8)
-            frame_array = frame_array.reshape((height, width, 3))
+            # Read one frame worth of bytes directly into the array
+            # (BufferedReader.readinto blocks until full or EOF)
+            n = process.stdout.readinto(memoryview(frame_array).cast('B'))
             
-            # Convert to PIL Image
-            frame_image = Image.fromarray(frame_array, mode='RGB')
+            if n < frame_size:
+                break
             
             # Calculate timestamp (ms) for this frame
             timestamp_sec = frame_idx / fps
@@ -126,7 +205,7 @@ def extract_frames(
                 timestamp_sec += start_time
             timestamp_ms = int(timestamp_sec * 1000)
             
-            yield (timestamp_ms, frame_image)
+            yield (timestamp_ms, frame_array)
             
             frame_idx += 1
         
@@ -140,10 +219,51 @@ def extract_frames(
         raise RuntimeError(f"Frame extraction failed: {str(e)}") from e
 
 
+def extract_frames(
+    filepath: str,
+    fps: float = 1.0,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+    max_size: Optional[int] = None,
+    hwaccel: Optional[str] = None,
+    metadata: Optional[dict] = None
+) -> Iterator[tuple[int, Image.Image]]:
+    """
+    Extract frames from video at specified FPS as PIL Images.
+    
+    Use extract_frames_np instead when the consumer takes numpy arrays.
+    Each PIL Image is a copy, so one frame buffer is reused for the reads.
+    
+    Args:
+        See extract_frames_np
+    
+    Yields:
+        Tuple of (timestamp_ms, PIL.Image)
+        
+    Example:
+        for timestamp_ms, frame in extract_frames("video.mp4", fps=1.0):
+            print(f"Frame at {timestamp_ms}ms")
+            frame.save(f"frame_{timestamp_ms}.jpg")
+    """
+    for timestamp_ms, frame_array in extract_frames_np(
+        filepath,
+        fps=fps,
+        start_time=start_time,
+        end_time=end_time,
+        max_size=max_size,
+        hwaccel=hwaccel,
+        reuse_buffer=True,
+        metadata=metadata
+    ):
+        yield (timestamp_ms, Image.fromarray(frame_array, mode='RGB'))
+
+
 def extract_single_frame(filepath: str, timestamp_sec: float) -> Image.Image:
     """
     Extract a single frame at specific timestamp.
     
+    Uses OpenCV in-process when settings.VIDEO_IN_PROCESS_DECODE is set.
+    
     Args:
         filepath: Path to video file
         timestamp_sec: Timestamp in seconds
@@ -151,30 +271,25 @@ def extract_single_frame(filepath: str, timestamp_sec: float) -> Image.Image:
     Returns:
         PIL Image
     """
+    if settings.VIDEO_IN_PROCESS_DECODE:
+        return _extract_single_frame_in_process(filepath, timestamp_sec)
+    
     try:
-        metadata = probe_video(filepath)
-        width = metadata['width']
-        height = metadata['height']
-        
-        # Seek to timestamp and extract 1 frame
-        process = (
+        # ss on the input (-ss before -i) seeks via the container index
+        # instead of decoding from the start. The frame comes back as a
+        # (lossless) PPM whose header carries its size, so no ffprobe call is
+        # needed first.
+        raw_frame, _ = (
             ffmpeg
             .input(filepath, ss=timestamp_sec)
-            .output('pipe:', vframes=1, format='rawvideo', pix_fmt='rgb24')
-            .run_async(pipe_stdout=True, pipe_stderr=True, quiet=True)
+            .output('pipe:', vframes=1, format='image2pipe', vcodec='ppm', pix_fmt='rgb24')
+            .run(capture_stdout=True, capture_stderr=True)
         )
         
-        raw_frame = process.stdout.read(width * height * 3)
-        process.stdout.close()
-        process.wait()
-        
         if not raw_frame:
             raise ValueError(f"Could not extract frame at {timestamp_sec}s")
         
-        frame_array = np.frombuffer(raw_frame, dtype=np.uint8)
-        frame_array = frame_array.reshape((height, width, 3))
-        
-        return Image.fromarray(frame_array, mode='RGB')
+        return Image.open(io.BytesIO(raw_frame)).convert('RGB')
         
     except ffmpeg.Error as e:
         raise RuntimeError(f"FFmpeg extraction failed: {e.stderr.decode()}") from e
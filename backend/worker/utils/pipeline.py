@@ -0,0 +1,79 @@
+"""Helpers for overlapping pipeline stages."""
+
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+
+T = TypeVar("T")
+
+# Marks the end of the producer's items
+_DONE = object()
+
+
+class _Failed:
+    """Carries an exception raised by the producer to the consumer."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(iterable: Iterable[T], depth: int) -> Iterator[T]:
+    """
+    Iterate over iterable while a background thread reads ahead of the consumer.
+
+    Lets a producer that mostly waits on I/O or a subprocess (e.g. ffmpeg
+    decoding in extract_frames) run while the consumer does other work.
+    At most depth items are buffered. An exception raised by the producer is
+    re-raised in the consumer, after the items produced before it.
+
+    Args:
+        iterable: Items to produce
+        depth: Max items buffered ahead of the consumer
+
+    Yields:
+        Items of iterable, in order
+    """
+    items: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        """Queue item unless the consumer has gone away; True if queued."""
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        it = iter(iterable)
+        try:
+            for item in it:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failed(e))
+        finally:
+            # Closes generators early (e.g. when the consumer stops)
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        # Consumer finished or stopped early: let a blocked producer exit
+        stop.set()
+        thread.join()
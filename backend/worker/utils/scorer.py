@@ -0,0 +1,94 @@
+"""Local cross-encoder relevance scoring for (query, caption) pairs."""
+
+import threading
+import numpy as np
+import torch
+from typing import Optional
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+
+# MS MARCO passage-ranking cross-encoder (~22M params, fast on CPU)
+CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L6-v2"
+
+# Global model instances (lazy-loaded). Searches score in worker threads,
+# so the first load is locked: concurrent first searches load it once.
+_tokenizer = None
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_cross_encoder(device: Optional[str] = None):
+    """
+    Get or create the global cross-encoder.
+
+    Relevance scores tolerate reduced precision, so the model runs in
+    bfloat16 on CUDA and with int8 dynamically quantized Linear layers on CPU.
+
+    Args:
+        device: Device to run on ("cpu" or "cuda"; default: cuda if available)
+
+    Returns:
+        (tokenizer, model) tuple
+    """
+    global _tokenizer, _model
+
+    if _model is not None:
+        return _tokenizer, _model
+
+    with _model_lock:
+        if _model is None:
+            device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+            print(f"Loading cross-encoder: {CROSS_ENCODER_MODEL} ({device})...")
+            _tokenizer = AutoTokenizer.from_pretrained(CROSS_ENCODER_MODEL)
+
+            if device.startswith("cuda"):
+                model = AutoModelForSequenceClassification.from_pretrained(
+                    CROSS_ENCODER_MODEL, torch_dtype=torch.bfloat16
+                ).to(device)
+            else:
+                model = torch.ao.quantization.quantize_dynamic(
+                    AutoModelForSequenceClassification.from_pretrained(CROSS_ENCODER_MODEL),
+                    {torch.nn.Linear},
+                    dtype=torch.qint8
+                )
+
+            # Published last: the unlocked check above reads _model
+            _model = model.eval()
+            print("✅ Cross-encoder loaded")
+
+        return _tokenizer, _model
+
+
+def score_batch(query: str, captions: list[str], batch_size: int = 32) -> np.ndarray:
+    """
+    Score how relevant each caption is to the query.
+
+    Args:
+        query: Search query text
+        captions: Caption texts
+        batch_size: Pairs per forward pass
+
+    Returns:
+        numpy array of shape (len(captions),), sigmoid scores in [0, 1]
+    """
+    if not captions:
+        return np.zeros(0, dtype=np.float32)
+
+    tokenizer, model = get_cross_encoder()
+
+    scores = []
+    with torch.inference_mode():
+        for start in range(0, len(captions), batch_size):
+            batch = captions[start:start + batch_size]
+            inputs = tokenizer(
+                [query] * len(batch),
+                batch,
+                padding=True,
+                truncation=True,
+                return_tensors="pt"
+            ).to(model.device)
+
+            logits = model(**inputs).logits.squeeze(-1).float()
+            scores.append(torch.sigmoid(logits).cpu().numpy())
+
+    return np.concatenate(scores)